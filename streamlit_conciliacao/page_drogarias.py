@@ -344,9 +344,7 @@ def mostrar_pagina_drogarias():
                     )
 
                     if not entries.empty:
-                        buf = BytesIO()
-                        entries.to_csv(buf, index=False, sep=";", encoding="utf-8-sig")
-                        csv_data = buf.getvalue()
+                        csv_data = entries.to_csv(index=False, sep=";").encode("utf-8-sig")
 
                         # Salvar CSV no session_state
                         st.session_state['drog_csv_data'] = csv_data
@@ -512,11 +510,9 @@ def mostrar_pagina_drogarias():
 
                     # Botao para baixar entradas
                     if not df_entradas.empty:
-                        buf = BytesIO()
-                        df_entradas.to_csv(buf, index=False, sep=";", encoding="utf-8-sig")
                         st.download_button(
                             "Baixar Entradas CSV",
-                            data=buf.getvalue(),
+                            data=df_entradas.to_csv(index=False, sep=";").encode("utf-8-sig"),
                             file_name="entradas_extrato.csv",
                             mime="text/csv"
                         )
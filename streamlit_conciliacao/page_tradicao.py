@@ -8,10 +8,14 @@ from __future__ import annotations
 
 import sys
 import os
-sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+_AQUI = os.path.dirname(os.path.abspath(__file__))
+if _AQUI not in sys.path:
+    sys.path.insert(0, _AQUI)
 
+import functools
+import hashlib
+from collections import OrderedDict
 import io
-from io import BytesIO
 from pathlib import Path
 from typing import Any, Dict, Optional, List
 
@@ -30,84 +34,380 @@ try:
 except ImportError:
     PDF_AVAILABLE = False
 
+try:
+    import xxhash
+    XXHASH_AVAILABLE = True
+except ImportError:
+    XXHASH_AVAILABLE = False
+
 
 # ============== Helpers locais (UI) ==============
 def _fmt_val(v: float) -> str:
     return f"{float(v):0.2f}".replace(".", ",")
 
 
+def _sem_duplicados(itens: List[Any]) -> List[Any]:
+    """
+    Remove mensagens de texto repetidas preservando a ordem.
+    Registros de transacao (dict) sao sempre mantidos: duas transacoes iguais
+    (ex.: duas tarifas identicas no mesmo dia) sao lancamentos distintos.
+    """
+    vistos = set()
+    saida: List[Any] = []
+    for item in itens:
+        if isinstance(item, str):
+            if item in vistos:
+                continue
+            vistos.add(item)
+        saida.append(item)
+    return saida
+
+
+# Colunas de rotulos repetidos (tipo do movimento, banco, fornecedor)
+_COLUNAS_CATEGORICAS = ('TIPO', 'BANCO', 'PAGAMENTO')
+
+
+def _categorizar(tabelas: Dict[str, pd.DataFrame]) -> Dict[str, pd.DataFrame]:
+    """Converte as colunas de rotulos repetidos para dtype category antes da conciliacao."""
+    for df in tabelas.values():
+        for col in _COLUNAS_CATEGORICAS:
+            if col in df.columns:
+                df[col] = df[col].astype('category')
+    return tabelas
+
+
+def _enxugar(df: pd.DataFrame) -> pd.DataFrame:
+    """Reduz dtypes para guardar/exibir: texto repetido vira category e inteiros encolhem.
+
+    Valores float ficam em float64 (sao moeda; float32 alteraria os centavos).
+    """
+    df = df.copy()
+    if len(df) == 0:
+        return df
+    for col in df.select_dtypes(include=['object', 'string']).columns:
+        if df[col].nunique() / len(df) < 0.5:
+            df[col] = df[col].astype('category')
+    for col in df.select_dtypes(include=['int64']).columns:
+        df[col] = pd.to_numeric(df[col], downcast='integer')
+    return df
+
+
+def _amostra(df: pd.DataFrame, linhas: int) -> pd.DataFrame:
+    """Primeiras linhas com dtypes nullable, so para exibicao.
+
+    convert_dtypes fica restrito a essa fatia: os frames do cache alimentam a
+    conciliacao, cujas comparacoes de float mudariam com dtypes nullable.
+    """
+    return df.head(linhas).convert_dtypes()
+
+
+# ============== CACHE DE PLANILHAS ==============
+# As planilhas carregadas ficam em st.cache_data (limitado, como na pagina VPS),
+# indexadas pelo hash do conteudo do upload: reruns e sessoes que enviam o mesmo
+# arquivo reaproveitam a leitura, e o session_state guarda apenas os hashes.
+# Cada chamada recebe uma copia; entradas descartadas levantam KeyError.
+def _hash_arquivo(arquivo: Any) -> str:
+    # xxh3 e ~10x mais rapido que md5 em uploads grandes; md5 fica como fallback
+    if XXHASH_AVAILABLE:
+        return xxhash.xxh3_64_hexdigest(arquivo.getvalue())
+    return hashlib.md5(arquivo.getvalue()).hexdigest()
+
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def _contas_por_hash(hash_arquivo: str, _arquivo: Any = None) -> Dict[str, pd.DataFrame]:
+    if _arquivo is None:
+        raise KeyError(hash_arquivo)
+    return _categorizar(carregar_contas_contabeis(_arquivo))
+
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def _movimentacao_por_hash(hash_arquivo: str, _arquivo: Any = None) -> Dict[str, pd.DataFrame]:
+    if _arquivo is None:
+        raise KeyError(hash_arquivo)
+    return _categorizar(carregar_planilha_movimentacao(_arquivo))
+
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def _extrato_por_hash(hash_arquivo: str, banco: str, pdf: bool, _arquivo: Any = None) -> pd.DataFrame:
+    if _arquivo is None:
+        raise KeyError(hash_arquivo)
+    if pdf:
+        return processar_pdf_extrato(_arquivo, banco)
+    return carregar_extrato(_arquivo, banco)
+
+
+# Resultado da conciliacao indexado pelos hashes/chaves dos uploads; as
+# planilhas em si (argumentos com _) ficam fora da chave do cache.
+@st.cache_data(show_spinner=False, max_entries=4)
+def _run_conciliacao(
+    contas_hash: str,
+    mov_hash: str,
+    chave_sicoob: Optional[tuple],
+    chave_bb: Optional[tuple],
+    _contas: Dict[str, pd.DataFrame],
+    _movimentacao: Dict[str, pd.DataFrame],
+    _df_sicoob: Optional[pd.DataFrame],
+    _df_bb: Optional[pd.DataFrame],
+):
+    return conciliar_tradicao(
+        df_extrato_sicoob=_df_sicoob,
+        df_extrato_bb=_df_bb,
+        movimentacao=_movimentacao,
+        contas=_contas
+    )
+
+
+# Sem cache: so roda ao processar, e os bytes ja ficam nos artefatos abaixo.
+def _to_csv_bytes(df: pd.DataFrame) -> bytes:
+    return df.to_csv(index=False, sep=";").encode("utf-8-sig")
+
+
+# Artefatos da conciliacao (resultado, nao encontrados, CSV) ficam num dicionario
+# de processo, enderecado pelo conteudo dos uploads: usuarios que enviam os
+# mesmos arquivos compartilham o mesmo resultado. O session_state guarda a chave e
+# uma referencia ao mesmo dict, para a sessao nao perder o resultado quando ele
+# sai do LRU por causa de uploads de outros usuarios.
+_MAX_ARTEFATOS = 8
+
+
+@st.cache_resource(show_spinner=False)
+def _artefatos() -> "OrderedDict[str, Dict[str, Any]]":
+    return OrderedDict()
+
+
+def _chave_artefatos(*partes: Any) -> str:
+    return hashlib.blake2b(repr(partes).encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _guardar_artefatos(chave: str, **artefatos: Any) -> None:
+    st.session_state['trad_artefatos'] = chave
+    st.session_state['trad_artefatos_dados'] = artefatos
+    _publicar_artefatos(chave, artefatos)
+
+
+def _publicar_artefatos(chave: str, artefatos: Dict[str, Any]) -> None:
+    store = _artefatos()
+    store[chave] = artefatos
+    store.move_to_end(chave)
+    while len(store) > _MAX_ARTEFATOS:
+        store.popitem(last=False)
+
+
+def _ler_artefatos() -> Optional[Dict[str, Any]]:
+    chave = st.session_state.get('trad_artefatos')
+    if not chave:
+        return None
+    artefatos = _artefatos().get(chave)
+    if artefatos is None:
+        # Descartado do LRU: volta a partir da copia da sessao
+        artefatos = st.session_state.get('trad_artefatos_dados')
+        if artefatos is not None:
+            _publicar_artefatos(chave, artefatos)
+    return artefatos
+
+
 # ============== PLANILHAS EXEMPLO ==============
+# Os modelos sao estaticos e ficam versionados em assets/; basta ler os bytes.
+_ASSETS_DIR = Path(__file__).parent / "assets"
+
+
+@functools.lru_cache(maxsize=1)
 def _gerar_exemplo_contas_contabeis() -> bytes:
-    """Gera planilha exemplo de Contas Contabeis com 3 abas."""
-    # Aba FINANCEIRO - fornecedores
-    df_financeiro = pd.DataFrame({
-        'PAGAMENTO': ['FORNECEDOR ABC LTDA', 'DISTRIBUIDORA XYZ', 'ATACADO NORTE', 'SERVICOS GERAIS'],
-        'CONTA': [101, 102, 103, 104],
-        'HISTORICO': ['Pagamento fornecedor', 'Pagamento fornecedor', 'Pagamento fornecedor', 'Pagamento servicos'],
-    })
-    # Aba BANCO DO BRASIL - cadastro por historico
-    df_bb = pd.DataFrame({
-        'HISTORICO': ['TARIFA PACOTE', 'DEB PACOTE SERVICOS', 'PIX RECEBIDO', 'DEPOSITO'],
-        'CONTA': [170, 170, 5, 5],
-        'TIPO': ['SAIDA', 'SAIDA', 'ENTRADA', 'ENTRADA'],
-    })
-    # Aba SICOOB - cadastro por historico
-    df_sicoob = pd.DataFrame({
-        'HISTORICO': ['TARIFA MENSAL', 'IOF', 'PIX RECEBIDO', 'TED RECEBIDA'],
-        'CONTA': [170, 171, 5, 5],
-        'TIPO': ['SAIDA', 'SAIDA', 'ENTRADA', 'ENTRADA'],
-    })
-    buffer = BytesIO()
-    with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
-        df_financeiro.to_excel(writer, index=False, sheet_name='FINANCEIRO')
-        df_bb.to_excel(writer, index=False, sheet_name='BANCO DO BRASIL')
-        df_sicoob.to_excel(writer, index=False, sheet_name='SICOOB')
-    return buffer.getvalue()
+    """Planilha exemplo de Contas Contabeis com 3 abas."""
+    return (_ASSETS_DIR / "EXEMPLO_Contas_Contabeis_Tradicao.xlsx").read_bytes()
 
 
+@functools.lru_cache(maxsize=1)
 def _gerar_exemplo_movimentacao() -> bytes:
-    """Gera planilha exemplo de Movimentacao com as abas necessarias."""
-    # Aba PAG SICOOB
-    df_pag_sicoob = pd.DataFrame({
-        'DATA': ['01/11/2025', '02/11/2025', '03/11/2025'],
-        'PAGAMENTO': ['FORNECEDOR ABC LTDA', 'DISTRIBUIDORA XYZ', 'ATACADO NORTE'],
-        'NF': ['12345', '67890', '11111'],
-        'VALOR': [1500.00, 2300.50, 890.00],
-    })
-    # Aba PAG BB
-    df_pag_bb = pd.DataFrame({
-        'DATA': ['04/11/2025', '05/11/2025'],
-        'PAGAMENTO': ['SERVICOS GERAIS', 'FORNECEDOR ABC LTDA'],
-        'NF': ['22222', '33333'],
-        'VALOR': [3200.00, 1800.00],
-    })
-    # Aba CAIXA EMPRESA (saidas)
-    df_caixa_saidas = pd.DataFrame({
-        'DATA': ['01/11/2025', '03/11/2025'],
-        'PAGAMENTO': ['DESPESA DIVERSA', 'MATERIAL ESCRITORIO'],
-        'NF': ['', '44444'],
-        'VALOR': [150.00, 89.90],
-    })
-    buffer = BytesIO()
-    with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
-        df_pag_sicoob.to_excel(writer, index=False, sheet_name='PAG SICOOB')
-        df_pag_bb.to_excel(writer, index=False, sheet_name='PAG BB')
-        df_caixa_saidas.to_excel(writer, index=False, sheet_name='CAIXA EMPRESA')
-    return buffer.getvalue()
+    """Planilha exemplo de Movimentacao com as abas necessarias."""
+    return (_ASSETS_DIR / "EXEMPLO_Movimentacao_Tradicao.xlsx").read_bytes()
 
 
+@functools.lru_cache(maxsize=1)
 def _gerar_exemplo_extrato() -> bytes:
-    """Gera planilha exemplo de Extrato Bancario."""
-    df = pd.DataFrame({
-        'Data': ['01/11/2025', '02/11/2025', '03/11/2025', '04/11/2025', '05/11/2025'],
-        'Historico': ['PIX ENVIADO FORNECEDOR ABC', 'PAG BOLETO DISTRIBUIDORA', 'TED ENVIADA ATACADO', 'TARIFA PACOTE SERVICOS', 'PIX RECEBIDO CLIENTE'],
-        'Debito': [1500.00, 2300.50, 890.00, 45.00, 0],
-        'Credito': [0, 0, 0, 0, 800.00],
-    })
-    buffer = BytesIO()
-    with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
-        df.to_excel(writer, index=False, sheet_name='Extrato')
-    return buffer.getvalue()
+    """Planilha exemplo de Extrato Bancario."""
+    return (_ASSETS_DIR / "EXEMPLO_Extrato_Bancario.xlsx").read_bytes()
+
+
+# ============== ABAS (fragmentos) ==============
+@st.fragment
+def _tab_resultados() -> None:
+    """Aba Resultados; reexecuta sozinha (ex.: cliques nos downloads)."""
+    artefatos = _ler_artefatos()
+    if artefatos is not None:
+        df_resultado = artefatos['resultado']
+        nao_encontrados = artefatos['nao_encontrados']
+
+        # Dashboard de metricas
+        st.subheader(" Dashboard de Conciliacao")
+
+        metricas = artefatos['metricas']
+        total_lanc = metricas['total']
+        total_nao_enc = metricas['nao_enc']
+        total_ok = metricas['ok']
+        pct_ok = metricas['pct']
+
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            st.metric(" Classificados", total_ok)
+        with col2:
+            st.metric(" Total Lancamentos", total_lanc)
+        with col3:
+            st.metric(" Nao Classificados", total_nao_enc)
+        with col4:
+            st.metric(" Taxa Classificacao", f"{pct_ok:.1f}%")
+
+        st.divider()
+
+        # Resultado
+        st.subheader(" Lancamentos Classificados")
+        if not df_resultado.empty:
+            # st.dataframe ja virtualiza a rolagem; nao precisa fatiar com head()
+            st.dataframe(df_resultado, use_container_width=True, height=400, hide_index=True)
+            st.caption(f"Total: {len(df_resultado)} lancamentos")
+        else:
+            st.info("Nenhum lancamento processado")
+
+        st.divider()
+
+        # Nao encontrados
+        if nao_encontrados:
+            st.subheader(f" Lancamentos Nao Classificados ({len(nao_encontrados)})")
+            st.warning("Os itens abaixo nao foram encontrados no plano de contas:")
+
+            if isinstance(nao_encontrados, list) and len(nao_encontrados) > 0:
+                if artefatos.get('nao_enc_df') is not None:
+                    st.dataframe(artefatos['nao_enc_df'], use_container_width=True)
+
+                    # Botao para baixar nao classificados
+                    st.download_button(
+                        " Baixar nao classificados",
+                        data=artefatos['nao_enc_csv'],
+                        file_name="lancamentos_nao_classificados.csv",
+                        mime="text/csv"
+                    )
+                else:
+                    st.markdown("\n".join(f"- {item}" for item in nao_encontrados[:20]))
+                    if len(nao_encontrados) > 20:
+                        st.caption(f"... e mais {len(nao_encontrados) - 20} itens")
+
+            with st.expander(" Como corrigir"):
+                st.markdown("""
+                1. **Fornecedores**: Cadastre na aba FINANCEIRO da planilha de Contas Contabeis
+                2. **Tarifas**: Cadastre na aba do banco correspondente (SICOOB ou BANCO DO BRASIL)
+                3. **Entradas**: Cadastre clientes ou contas de receita
+                4. Apos cadastrar, recarregue os arquivos e processe novamente
+                """)
+        else:
+            st.success(" Todos os lancamentos foram classificados!")
+            st.balloons()
+
+        st.divider()
+
+        # Analise de qualidade
+        st.subheader(" Analise de Qualidade")
+
+        if pct_ok >= 95:
+            st.success(f" **Excelente**: {pct_ok:.1f}% dos lancamentos classificados")
+            st.caption("A maioria dos lancamentos foram classificados com sucesso.")
+        elif pct_ok >= 85:
+            st.warning(f" **Bom**: {pct_ok:.1f}% dos lancamentos classificados")
+            st.caption("Alguns lancamentos precisam de atencao.")
+        else:
+            st.error(f" **Critico**: Apenas {pct_ok:.1f}% dos lancamentos classificados")
+            st.caption("Muitos lancamentos nao foram classificados. Revise o plano de contas.")
+
+    else:
+        st.info(" Faca upload de todos os arquivos e clique em **PROCESSAR** na aba Processo para ver os resultados.")
+
+
+@st.fragment
+def _tab_avancado() -> None:
+    """Aba Avancado; widgets desta aba nao reexecutam a pagina inteira."""
+    if "trad_mov_hash" in st.session_state:
+        st.header(" Configuracoes Avancadas")
+
+        # Validacoes de Cadastros
+        if "trad_validation_result" in st.session_state:
+            validation_result = st.session_state["trad_validation_result"]
+
+            st.subheader(" Validacao de Cadastros")
+
+            if validation_result and validation_result.get("tem_bloqueadores"):
+                st.error(" **PROBLEMAS DETECTADOS** - Corrija antes de exportar")
+
+                if validation_result.get("fornecedores_faltantes"):
+                    with st.expander(
+                        f" Fornecedores sem Conta ({len(validation_result['fornecedores_faltantes'])})",
+                        expanded=True
+                    ):
+                        st.warning("\n\n".join(f" {forn}" for forn in validation_result["fornecedores_faltantes"]))
+
+                if validation_result.get("clientes_faltantes"):
+                    with st.expander(
+                        f" Clientes sem Conta ({len(validation_result['clientes_faltantes'])})",
+                        expanded=True
+                    ):
+                        st.warning("\n\n".join(f" {cli}" for cli in validation_result["clientes_faltantes"]))
+
+                if validation_result.get("contas_especiais_faltantes"):
+                    with st.expander(
+                        f" Contas Especiais Faltantes ({len(validation_result['contas_especiais_faltantes'])})",
+                        expanded=True
+                    ):
+                        st.error("\n\n".join(f" {conta}" for conta in validation_result["contas_especiais_faltantes"]))
+            else:
+                st.success(" Todas as validacoes passaram!")
+
+        st.divider()
+
+        # Pre-visualizacao expandida dos dados
+        st.subheader(" Pre-visualizacao dos Dados")
+        # Limita o payload enviado ao navegador; as tabelas completas ficam no cache
+        linhas = int(st.number_input(
+            "Linhas a exibir",
+            min_value=50, max_value=10000, value=200, step=50,
+            key="trad_linhas_preview"
+        ))
+
+        try:
+            if "trad_mov_hash" in st.session_state:
+                with st.expander(" Pagamentos (completo)", expanded=False):
+                    df_pag = _movimentacao_por_hash(st.session_state["trad_mov_hash"])
+                    if isinstance(df_pag, dict):
+                        for key, df in df_pag.items():
+                            st.markdown(f"**{key}**")
+                            st.dataframe(_amostra(df, linhas), use_container_width=True, height=200)
+                    else:
+                        st.dataframe(_amostra(df_pag, linhas), use_container_width=True, height=400)
+
+            if "trad_ext_sicoob_chave" in st.session_state:
+                with st.expander(" Extrato SICOOB (completo)", expanded=False):
+                    df_sicoob = _extrato_por_hash(*st.session_state["trad_ext_sicoob_chave"])
+                    st.dataframe(_amostra(df_sicoob, linhas), use_container_width=True, height=400)
+                    st.caption(f"Total: {len(df_sicoob)} registros")
+
+            if "trad_ext_bb_chave" in st.session_state:
+                with st.expander(" Extrato BB (completo)", expanded=False):
+                    df_bb = _extrato_por_hash(*st.session_state["trad_ext_bb_chave"])
+                    st.dataframe(_amostra(df_bb, linhas), use_container_width=True, height=400)
+                    st.caption(f"Total: {len(df_bb)} registros")
+
+            if "trad_contas_hash" in st.session_state:
+                with st.expander(" Plano de Contas (completo)", expanded=False):
+                    df_contas = _contas_por_hash(st.session_state["trad_contas_hash"])
+                    if isinstance(df_contas, dict):
+                        for key, df in df_contas.items():
+                            st.markdown(f"**{key}**")
+                            st.dataframe(_amostra(df, linhas), use_container_width=True, height=200)
+                    else:
+                        st.dataframe(_amostra(df_contas, linhas), use_container_width=True, height=400)
+        except KeyError:
+            # Cache de planilhas foi limpo (ex.: reinicio do servidor)
+            st.info(" Os dados carregados expiraram. Processe a conciliacao novamente.")
+
+    else:
+        st.info(" Faca upload de todos os arquivos na aba **Processo** para acessar configuracoes avancadas.")
 
 
 # ============== PAGINA TRADICAO ==============
@@ -118,13 +418,14 @@ def mostrar_pagina_tradicao():
     st.markdown("**Tradicao Comercio e Servicos LTDA**")
 
     # Botao de download CSV no topo
-    if 'trad_csv_data' in st.session_state:
+    artefatos = _ler_artefatos()
+    if artefatos and artefatos.get('csv_data') is not None:
         col1, col2, col3 = st.columns([1, 2, 1])
         with col2:
             st.download_button(
                 label=" BAIXAR CSV FINAL",
-                data=st.session_state['trad_csv_data'],
-                file_name=st.session_state.get('trad_csv_filename', 'lancamentos_tradicao.csv'),
+                data=artefatos['csv_data'],
+                file_name=artefatos.get('csv_filename', 'lancamentos_tradicao.csv'),
                 mime="text/csv",
                 type="primary",
                 use_container_width=True
@@ -308,27 +609,28 @@ def mostrar_pagina_tradicao():
             btn = False
 
     # ==========================================================================
-    # PROCESSAR ARQUIVOS (se todos carregados)
+    # PROCESSAR ARQUIVOS (somente ao clicar em Conciliar; trocar radios ou
+    # abas nao deve reler as planilhas)
     # ==========================================================================
-    if arquivos_ok and tem_extrato:
+    if arquivos_ok and tem_extrato and btn:
         try:
-            contas = carregar_contas_contabeis(contas_file)
-            movimentacao = carregar_planilha_movimentacao(mov_file)
+            contas_hash = _hash_arquivo(contas_file)
+            mov_hash = _hash_arquivo(mov_file)
+            contas = _contas_por_hash(contas_hash, contas_file)
+            movimentacao = _movimentacao_por_hash(mov_hash, mov_file)
 
+            chave_sicoob = None
+            chave_bb = None
             df_extrato_sicoob = None
             df_extrato_bb = None
 
             if extrato_sicoob:
-                if tipo_sicoob == "PDF" and PDF_AVAILABLE:
-                    df_extrato_sicoob = processar_pdf_extrato(extrato_sicoob, 'SICOOB')
-                else:
-                    df_extrato_sicoob = carregar_extrato(extrato_sicoob, 'SICOOB')
+                chave_sicoob = (_hash_arquivo(extrato_sicoob), 'SICOOB', tipo_sicoob == "PDF" and PDF_AVAILABLE)
+                df_extrato_sicoob = _extrato_por_hash(*chave_sicoob, extrato_sicoob)
 
             if extrato_bb:
-                if tipo_bb == "PDF" and PDF_AVAILABLE:
-                    df_extrato_bb = processar_pdf_extrato(extrato_bb, 'BB')
-                else:
-                    df_extrato_bb = carregar_extrato(extrato_bb, 'BB')
+                chave_bb = (_hash_arquivo(extrato_bb), 'BB', tipo_bb == "PDF" and PDF_AVAILABLE)
+                df_extrato_bb = _extrato_por_hash(*chave_bb, extrato_bb)
 
         except Exception as e:
             st.error(f" Erro na leitura: {e}")
@@ -336,36 +638,62 @@ def mostrar_pagina_tradicao():
             movimentacao = None
 
         # Logica do botao CONCILIAR
-        if btn:
+        if contas is not None and movimentacao is not None:
             with st.spinner("Processando conciliacao..."):
                 try:
-                    df_resultado, nao_encontrados = conciliar_tradicao(
-                        df_extrato_sicoob=df_extrato_sicoob,
-                        df_extrato_bb=df_extrato_bb,
-                        movimentacao=movimentacao,
-                        contas=contas
+                    df_resultado, nao_encontrados = _run_conciliacao(
+                        contas_hash,
+                        mov_hash,
+                        chave_sicoob,
+                        chave_bb,
+                        contas,
+                        movimentacao,
+                        df_extrato_sicoob,
+                        df_extrato_bb,
                     )
 
-                    # Salvar no session_state
-                    st.session_state['trad_resultado'] = df_resultado
-                    st.session_state['trad_nao_encontrados'] = nao_encontrados
-                    st.session_state['trad_df_pag'] = movimentacao  # Para tab avancado
-                    st.session_state['trad_df_contas'] = contas
-
-                    if df_extrato_sicoob is not None:
-                        st.session_state['trad_df_ext_sicoob'] = df_extrato_sicoob
-                    if df_extrato_bb is not None:
-                        st.session_state['trad_df_ext_bb'] = df_extrato_bb
+                    chave_artefatos = _chave_artefatos(contas_hash, mov_hash, chave_sicoob, chave_bb)
+                    csv_data = _to_csv_bytes(df_resultado) if not df_resultado.empty else None
+                    nao_encontrados = _sem_duplicados(nao_encontrados)
+
+                    # Tabela e CSV dos nao classificados montados uma vez aqui
+                    df_nao_enc = None
+                    csv_nao_enc = None
+                    if nao_encontrados and isinstance(nao_encontrados[0], dict):
+                        df_nao_enc = pd.DataFrame(nao_encontrados)
+                        csv_nao_enc = _to_csv_bytes(df_nao_enc)
+                        df_nao_enc = _enxugar(df_nao_enc)
+
+                    total_lanc = len(df_resultado)
+                    total_ok = total_lanc - len(nao_encontrados)
+                    metricas = {
+                        'total': total_lanc,
+                        'nao_enc': len(nao_encontrados),
+                        'ok': total_ok,
+                        'pct': (total_ok / total_lanc * 100) if total_lanc > 0 else 0,
+                    }
+
+                    _guardar_artefatos(
+                        chave_artefatos,
+                        resultado=_enxugar(df_resultado),
+                        nao_encontrados=nao_encontrados,
+                        metricas=metricas,
+                        nao_enc_df=df_nao_enc,
+                        nao_enc_csv=csv_nao_enc,
+                        csv_data=csv_data,
+                        csv_filename="lancamentos_contabeis_tradicao.csv",
+                    )
 
-                    # Gerar CSV
-                    if not df_resultado.empty:
-                        buf = BytesIO()
-                        df_resultado.to_csv(buf, index=False, sep=";", encoding="utf-8-sig")
-                        csv_data = buf.getvalue()
+                    # Salvar no session_state (chaves; os artefatos ja foram guardados acima)
+                    st.session_state['trad_mov_hash'] = mov_hash  # Para tab avancado
+                    st.session_state['trad_contas_hash'] = contas_hash
 
-                        st.session_state['trad_csv_data'] = csv_data
-                        st.session_state['trad_csv_filename'] = "lancamentos_contabeis_tradicao.csv"
+                    if chave_sicoob is not None:
+                        st.session_state['trad_ext_sicoob_chave'] = chave_sicoob
+                    if chave_bb is not None:
+                        st.session_state['trad_ext_bb_chave'] = chave_bb
 
+                    if csv_data is not None:
                         st.success(" **CSV gerado com sucesso!** Use o botao BAIXAR CSV no topo da pagina.")
                         st.rerun()
 
@@ -377,170 +705,8 @@ def mostrar_pagina_tradicao():
 
     # ====== TAB 1: RESULTADOS ======
     with tabs[1]:
-        if 'trad_resultado' in st.session_state:
-            df_resultado = st.session_state['trad_resultado']
-            nao_encontrados = st.session_state.get('trad_nao_encontrados', [])
-
-            # Dashboard de metricas
-            st.subheader(" Dashboard de Conciliacao")
-
-            total_lanc = len(df_resultado)
-            total_nao_enc = len(nao_encontrados)
-            total_ok = total_lanc - total_nao_enc
-            pct_ok = (total_ok / total_lanc * 100) if total_lanc > 0 else 0
-
-            col1, col2, col3, col4 = st.columns(4)
-            with col1:
-                st.metric(" Classificados", total_ok)
-            with col2:
-                st.metric(" Total Lancamentos", total_lanc)
-            with col3:
-                st.metric(" Nao Classificados", total_nao_enc)
-            with col4:
-                st.metric(" Taxa Classificacao", f"{pct_ok:.1f}%")
-
-            st.divider()
-
-            # Resultado
-            st.subheader(" Lancamentos Classificados")
-            if not df_resultado.empty:
-                # Mostrar preview
-                st.dataframe(df_resultado.head(20), use_container_width=True, height=400)
-                st.caption(f"Mostrando 20 de {len(df_resultado)} lancamentos")
-            else:
-                st.info("Nenhum lancamento processado")
-
-            st.divider()
-
-            # Nao encontrados
-            if nao_encontrados:
-                st.subheader(f" Lancamentos Nao Classificados ({len(nao_encontrados)})")
-                st.warning("Os itens abaixo nao foram encontrados no plano de contas:")
-                
-                if isinstance(nao_encontrados, list) and len(nao_encontrados) > 0:
-                    if isinstance(nao_encontrados[0], dict):
-                        df_nao_encontrados = pd.DataFrame(nao_encontrados)
-                        st.dataframe(df_nao_encontrados, use_container_width=True)
-                        
-                        # Botao para baixar nao classificados
-                        csv_nao_enc = df_nao_encontrados.to_csv(sep=";", index=False, encoding="utf-8-sig")
-                        st.download_button(
-                            " Baixar nao classificados",
-                            data=csv_nao_enc.encode("utf-8-sig"),
-                            file_name="lancamentos_nao_classificados.csv",
-                            mime="text/csv"
-                        )
-                    else:
-                        for item in nao_encontrados[:20]:
-                            st.write(f" {item}")
-                        if len(nao_encontrados) > 20:
-                            st.caption(f"... e mais {len(nao_encontrados) - 20} itens")
-                
-                with st.expander(" Como corrigir"):
-                    st.markdown("""
-                    1. **Fornecedores**: Cadastre na aba FINANCEIRO da planilha de Contas Contabeis
-                    2. **Tarifas**: Cadastre na aba do banco correspondente (SICOOB ou BANCO DO BRASIL)
-                    3. **Entradas**: Cadastre clientes ou contas de receita
-                    4. Apos cadastrar, recarregue os arquivos e processe novamente
-                    """)
-            else:
-                st.success(" Todos os lancamentos foram classificados!")
-                st.balloons()
-
-            st.divider()
-
-            # Analise de qualidade
-            st.subheader(" Analise de Qualidade")
-
-            if pct_ok >= 95:
-                st.success(f" **Excelente**: {pct_ok:.1f}% dos lancamentos classificados")
-                st.caption("A maioria dos lancamentos foram classificados com sucesso.")
-            elif pct_ok >= 85:
-                st.warning(f" **Bom**: {pct_ok:.1f}% dos lancamentos classificados")
-                st.caption("Alguns lancamentos precisam de atencao.")
-            else:
-                st.error(f" **Critico**: Apenas {pct_ok:.1f}% dos lancamentos classificados")
-                st.caption("Muitos lancamentos nao foram classificados. Revise o plano de contas.")
-
-        else:
-            st.info(" Faca upload de todos os arquivos e clique em **PROCESSAR** na aba Processo para ver os resultados.")
+        _tab_resultados()
 
     # ====== TAB 2: AVANCADO ======
     with tabs[2]:
-        if "trad_df_pag" in st.session_state:
-            st.header(" Configuracoes Avancadas")
-
-            # Validacoes de Cadastros
-            if "trad_validation_result" in st.session_state:
-                validation_result = st.session_state["trad_validation_result"]
-
-                st.subheader(" Validacao de Cadastros")
-
-                if validation_result and validation_result.get("tem_bloqueadores"):
-                    st.error(" **PROBLEMAS DETECTADOS** - Corrija antes de exportar")
-
-                    if validation_result.get("fornecedores_faltantes"):
-                        with st.expander(
-                            f" Fornecedores sem Conta ({len(validation_result['fornecedores_faltantes'])})",
-                            expanded=True
-                        ):
-                            for forn in validation_result["fornecedores_faltantes"]:
-                                st.warning(f" {forn}")
-
-                    if validation_result.get("clientes_faltantes"):
-                        with st.expander(
-                            f" Clientes sem Conta ({len(validation_result['clientes_faltantes'])})",
-                            expanded=True
-                        ):
-                            for cli in validation_result["clientes_faltantes"]:
-                                st.warning(f" {cli}")
-
-                    if validation_result.get("contas_especiais_faltantes"):
-                        with st.expander(
-                            f" Contas Especiais Faltantes ({len(validation_result['contas_especiais_faltantes'])})",
-                            expanded=True
-                        ):
-                            for conta in validation_result["contas_especiais_faltantes"]:
-                                st.error(f" {conta}")
-                else:
-                    st.success(" Todas as validacoes passaram!")
-
-            st.divider()
-
-            # Pre-visualizacao expandida dos dados
-            st.subheader(" Pre-visualizacao dos Dados")
-
-            if "trad_df_pag" in st.session_state:
-                with st.expander(" Pagamentos (completo)", expanded=False):
-                    df_pag = st.session_state["trad_df_pag"]
-                    if isinstance(df_pag, dict):
-                        for key, df in df_pag.items():
-                            st.markdown(f"**{key}**")
-                            st.dataframe(df, use_container_width=True, height=200)
-                    else:
-                        st.dataframe(df_pag, use_container_width=True, height=400)
-
-            if "trad_df_ext_sicoob" in st.session_state:
-                with st.expander(" Extrato SICOOB (completo)", expanded=False):
-                    df_sicoob = st.session_state["trad_df_ext_sicoob"]
-                    st.dataframe(df_sicoob, use_container_width=True, height=400)
-                    st.caption(f"Total: {len(df_sicoob)} registros")
-
-            if "trad_df_ext_bb" in st.session_state:
-                with st.expander(" Extrato BB (completo)", expanded=False):
-                    df_bb = st.session_state["trad_df_ext_bb"]
-                    st.dataframe(df_bb, use_container_width=True, height=400)
-                    st.caption(f"Total: {len(df_bb)} registros")
-
-            if "trad_df_contas" in st.session_state:
-                with st.expander(" Plano de Contas (completo)", expanded=False):
-                    df_contas = st.session_state["trad_df_contas"]
-                    if isinstance(df_contas, dict):
-                        for key, df in df_contas.items():
-                            st.markdown(f"**{key}**")
-                            st.dataframe(df, use_container_width=True, height=200)
-                    else:
-                        st.dataframe(df_contas, use_container_width=True, height=400)
-
-        else:
-            st.info(" Faca upload de todos os arquivos na aba **Processo** para acessar configuracoes avancadas.")
+        _tab_avancado()
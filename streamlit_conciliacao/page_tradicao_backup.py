@@ -9,11 +9,14 @@ import sys
 import os
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
+import hashlib
 import io
+from functools import lru_cache
 from io import BytesIO
 from pathlib import Path
 from typing import Any, Dict, Optional, List
 
+import numpy as np
 import pandas as pd
 import streamlit as st
 
@@ -29,35 +32,144 @@ try:
 except ImportError:
     PDF_AVAILABLE = False
 
+try:
+    from tradicao.extrator_pdf import processar_pdf_extrato_fitz, FITZ_AVAILABLE
+except ImportError:
+    FITZ_AVAILABLE = False
+
+# Upload de PDF fica disponivel com qualquer um dos dois backends
+PDF_SUPORTADO = PDF_AVAILABLE or FITZ_AVAILABLE
+
 
 # ============== Helpers locais (UI) ==============
+@lru_cache(maxsize=4096)
 def _fmt_val(v: float) -> str:
     return f"{float(v):0.2f}".replace(".", ",")
 
 
+def _render_empty(tab: Any) -> None:
+    """Aviso padrao das abas enquanto os arquivos nao foram carregados."""
+    with tab:
+        st.warning(" Faca upload de todos os arquivos na aba Upload Arquivos para continuar.")
+
+
+# ============== LEITURA COM CACHE ==============
+# Chaveadas pelos bytes do upload (o objeto UploadedFile muda a cada rerun) e
+# limitadas a 8 entradas, como na pagina Tradicao: cada chave guarda o arquivo.
+# Contas e so tabela de consulta: cache_resource devolve o mesmo objeto sem a
+# copia que o cache_data faz a cada leitura. Nao alterar o dict devolvido: ele e
+# compartilhado entre sessoes. Limitado a 8 entradas como os demais loaders.
+@st.cache_resource(show_spinner=False, max_entries=8)
+def _load_contas_resource(file_bytes: bytes) -> Dict[str, pd.DataFrame]:
+    return carregar_contas_contabeis(BytesIO(file_bytes))
+
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def _load_movimentacao(file_bytes: bytes) -> Dict[str, pd.DataFrame]:
+    return carregar_planilha_movimentacao(BytesIO(file_bytes))
+
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def _load_extrato(file_bytes: bytes, banco: str) -> pd.DataFrame:
+    return carregar_extrato(BytesIO(file_bytes), banco)
+
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def _load_extrato_pdf(file_bytes: bytes, banco: str) -> pd.DataFrame:
+    # PyMuPDF quando instalado; pdfplumber fica como fallback, inclusive quando o
+    # texto do fitz (ordem/espacamento diferentes) nao rende nenhum lancamento
+    if FITZ_AVAILABLE:
+        df = processar_pdf_extrato_fitz(BytesIO(file_bytes), banco)
+        if not df.empty or not PDF_AVAILABLE:
+            return df
+    return processar_pdf_extrato(BytesIO(file_bytes), banco)
+
+
+def _md5(arquivo: Any) -> Optional[str]:
+    return hashlib.md5(arquivo.getvalue()).hexdigest() if arquivo is not None else None
+
+
+def _extrato_da_sessao(arquivo: Any, banco: str, pdf: bool) -> pd.DataFrame:
+    """Extrato lido do session_state enquanto o upload (hash) e o tipo nao mudarem."""
+    prefixo = f"trad_{banco.lower()}"
+    chave = (_md5(arquivo), pdf)
+    if st.session_state.get(f"{prefixo}_key") != chave:
+        if pdf:
+            df = _load_extrato_pdf(arquivo.getvalue(), banco)
+        else:
+            df = _load_extrato(arquivo.getvalue(), banco)
+        st.session_state[f"{prefixo}_key"] = chave
+        st.session_state[f"{prefixo}_df"] = df
+    return st.session_state[f"{prefixo}_df"]
+
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def _run_conciliacao(
+    contas_hash: str,
+    mov_hash: str,
+    sicoob_hash: Optional[str],
+    bb_hash: Optional[str],
+    _contas: Dict[str, pd.DataFrame],
+    _movimentacao: Dict[str, pd.DataFrame],
+    _df_sicoob: Optional[pd.DataFrame],
+    _df_bb: Optional[pd.DataFrame],
+):
+    """Conciliacao cacheada pelos hashes dos uploads (os objetos _* nao entram na chave)."""
+    return conciliar_tradicao(
+        df_extrato_sicoob=_df_sicoob,
+        df_extrato_bb=_df_bb,
+        movimentacao=_movimentacao,
+        contas=_contas
+    )
+
+
+def _preview(df: pd.DataFrame, n: int = 10) -> pd.DataFrame:
+    """Primeiras n linhas (head e barato; cachear exigiria hashear o frame inteiro)."""
+    return df.head(n).reset_index(drop=True)
+
+
+def _build_xlsx_bytes(df: pd.DataFrame) -> bytes:
+    """Serializa o resultado em xlsx (chamado uma vez, ao conciliar)."""
+    buffer = BytesIO()
+    with pd.ExcelWriter(buffer, engine="xlsxwriter") as writer:
+        df.to_excel(writer, index=False, sheet_name="Conciliacao")
+    return buffer.getvalue()
+
+
 # ============== PLANILHAS EXEMPLO ==============
+def _aba(colunas: Dict[str, List[Any]]) -> pd.DataFrame:
+    """Monta uma aba exemplo a partir de arrays ja tipados (texto como object)."""
+    return pd.DataFrame.from_dict(
+        {
+            col: np.asarray(vals, dtype=object) if isinstance(vals[0], str) else np.asarray(vals)
+            for col, vals in colunas.items()
+        },
+        orient='columns',
+    )
+
+
 def _gerar_exemplo_contas_contabeis() -> bytes:
     """Gera planilha exemplo de Contas Contabeis com 3 abas."""
     # Aba FINANCEIRO - fornecedores
-    df_financeiro = pd.DataFrame({
+    df_financeiro = _aba({
         'PAGAMENTO': ['FORNECEDOR ABC LTDA', 'DISTRIBUIDORA XYZ', 'ATACADO NORTE', 'SERVICOS GERAIS'],
         'CONTA': [101, 102, 103, 104],
         'HISTORICO': ['Pagamento fornecedor', 'Pagamento fornecedor', 'Pagamento fornecedor', 'Pagamento servicos'],
     })
     # Aba BANCO DO BRASIL - cadastro por historico
-    df_bb = pd.DataFrame({
+    df_bb = _aba({
         'HISTORICO': ['TARIFA PACOTE', 'DEB PACOTE SERVICOS', 'PIX RECEBIDO', 'DEPOSITO'],
         'CONTA': [170, 170, 5, 5],
         'TIPO': ['SAIDA', 'SAIDA', 'ENTRADA', 'ENTRADA'],
     })
     # Aba SICOOB - cadastro por historico
-    df_sicoob = pd.DataFrame({
+    df_sicoob = _aba({
         'HISTORICO': ['TARIFA MENSAL', 'IOF', 'PIX RECEBIDO', 'TED RECEBIDA'],
         'CONTA': [170, 171, 5, 5],
         'TIPO': ['SAIDA', 'SAIDA', 'ENTRADA', 'ENTRADA'],
     })
     buffer = BytesIO()
-    with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
+    with pd.ExcelWriter(buffer, engine='xlsxwriter') as writer:
         df_financeiro.to_excel(writer, index=False, sheet_name='FINANCEIRO')
         df_bb.to_excel(writer, index=False, sheet_name='BANCO DO BRASIL')
         df_sicoob.to_excel(writer, index=False, sheet_name='SICOOB')
@@ -67,35 +179,35 @@ def _gerar_exemplo_contas_contabeis() -> bytes:
 def _gerar_exemplo_movimentacao() -> bytes:
     """Gera planilha exemplo de Movimentacao com as abas necessarias."""
     # Aba PAG SICOOB
-    df_pag_sicoob = pd.DataFrame({
+    df_pag_sicoob = _aba({
         'DATA': ['01/11/2025', '02/11/2025', '03/11/2025'],
         'PAGAMENTO': ['FORNECEDOR ABC LTDA', 'DISTRIBUIDORA XYZ', 'ATACADO NORTE'],
         'NF': ['12345', '67890', '11111'],
         'VALOR': [1500.00, 2300.50, 890.00],
     })
     # Aba PAG BB
-    df_pag_bb = pd.DataFrame({
+    df_pag_bb = _aba({
         'DATA': ['04/11/2025', '05/11/2025'],
         'PAGAMENTO': ['SERVICOS GERAIS', 'FORNECEDOR ABC LTDA'],
         'NF': ['22222', '33333'],
         'VALOR': [3200.00, 1800.00],
     })
     # Aba CAIXA EMPRESA (saidas)
-    df_caixa_saidas = pd.DataFrame({
+    df_caixa_saidas = _aba({
         'DATA': ['01/11/2025', '03/11/2025'],
         'PAGAMENTO': ['DESPESA DIVERSA', 'MATERIAL ESCRITORIO'],
         'NF': ['', '44444'],
         'VALOR': [150.00, 89.90],
     })
     # Aba CAIXA EMPRESA (entradas)
-    df_caixa_entradas = pd.DataFrame({
+    df_caixa_entradas = _aba({
         'DATA': ['02/11/2025', '04/11/2025'],
         'PAGAMENTO': ['VENDA BALCAO', 'RECEBIMENTO CLIENTE'],
         'NF': ['55555', '66666'],
         'VALOR': [500.00, 1200.00],
     })
     buffer = BytesIO()
-    with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
+    with pd.ExcelWriter(buffer, engine='xlsxwriter') as writer:
         df_pag_sicoob.to_excel(writer, index=False, sheet_name='PAG SICOOB')
         df_pag_bb.to_excel(writer, index=False, sheet_name='PAG BB')
         df_caixa_saidas.to_excel(writer, index=False, sheet_name='CAIXA EMPRESA')
@@ -104,19 +216,36 @@ def _gerar_exemplo_movimentacao() -> bytes:
 
 def _gerar_exemplo_extrato() -> bytes:
     """Gera planilha exemplo de Extrato Bancario."""
-    df = pd.DataFrame({
+    df = _aba({
         'Data': ['01/11/2025', '02/11/2025', '03/11/2025', '04/11/2025', '05/11/2025'],
         'Historico': ['PIX ENVIADO FORNECEDOR ABC', 'PAG BOLETO DISTRIBUIDORA', 'TED ENVIADA ATACADO', 'TARIFA PACOTE SERVICOS', 'PIX RECEBIDO CLIENTE'],
         'Debito': [1500.00, 2300.50, 890.00, 45.00, 0],
         'Credito': [0, 0, 0, 0, 800.00],
     })
     buffer = BytesIO()
-    with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
+    with pd.ExcelWriter(buffer, engine='xlsxwriter') as writer:
         df.to_excel(writer, index=False, sheet_name='Extrato')
     return buffer.getvalue()
 
 
+# Bytes dos exemplos materializados uma vez na importacao (~4 KB cada); as
+# funcoes geradoras nao passam pelo st.cache_data, que so duplicaria o conteudo.
+_EX_CONTAS_BYTES = _gerar_exemplo_contas_contabeis()
+_EX_MOV_BYTES = _gerar_exemplo_movimentacao()
+_EX_EXTRATO_BYTES = _gerar_exemplo_extrato()
+
+
 # ============== PAGINA TRADICAO ==============
+_TAB_LABELS = (
+    " Upload Arquivos",
+    " Pre-visualizacao",
+    " Conciliacao",
+    " Resultado",
+    " Export CSV",
+    " Nao Classificados",
+)
+
+
 def mostrar_pagina_tradicao():
     """Renderiza a pagina de conciliacao da Tradicao."""
 
@@ -127,7 +256,7 @@ def mostrar_pagina_tradicao():
     # ==========================================================================
     # TABS PRINCIPAIS
     # ==========================================================================
-    tabs = st.tabs([" Upload Arquivos", " Pre-visualizacao", " Conciliacao", " Resultado", " Export CSV", " Nao Classificados"])
+    tabs = st.tabs(list(_TAB_LABELS))
 
     # ==========================================================================
     # ABA 0 - UPLOAD DE ARQUIVOS
@@ -186,7 +315,7 @@ def mostrar_pagina_tradicao():
             if tipo_sicoob == "Excel":
                 extrato_sicoob = st.file_uploader("Extrato SICOOB (.xlsx)", type=["xlsx"], key="trad_ext_sicoob")
             else:
-                if PDF_AVAILABLE:
+                if PDF_SUPORTADO:
                     extrato_sicoob = st.file_uploader("Extrato SICOOB (.pdf)", type=["pdf"], key="trad_ext_sicoob_pdf")
                 else:
                     st.warning(" PDF nao disponivel")
@@ -206,7 +335,7 @@ def mostrar_pagina_tradicao():
             if tipo_bb == "Excel":
                 extrato_bb = st.file_uploader("Extrato BB (.xlsx)", type=["xlsx"], key="trad_ext_bb")
             else:
-                if PDF_AVAILABLE:
+                if PDF_SUPORTADO:
                     extrato_bb = st.file_uploader("Extrato BB (.pdf)", type=["pdf"], key="trad_ext_bb_pdf")
                 else:
                     st.warning(" PDF nao disponivel")
@@ -233,7 +362,7 @@ def mostrar_pagina_tradicao():
             st.caption("Abas: FINANCEIRO, BANCO DO BRASIL, SICOOB")
             st.download_button(
                 " Baixar Exemplo",
-                data=_gerar_exemplo_contas_contabeis(),
+                data=_EX_CONTAS_BYTES,
                 file_name="EXEMPLO_Contas_Contabeis_Tradicao.xlsx",
                 mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
                 key="ex_contas_trad"
@@ -244,7 +373,7 @@ def mostrar_pagina_tradicao():
             st.caption("Abas: PAG SICOOB, PAG BB, CAIXA EMPRESA")
             st.download_button(
                 " Baixar Exemplo",
-                data=_gerar_exemplo_movimentacao(),
+                data=_EX_MOV_BYTES,
                 file_name="EXEMPLO_Movimentacao_Tradicao.xlsx",
                 mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
                 key="ex_mov_trad"
@@ -255,7 +384,7 @@ def mostrar_pagina_tradicao():
             st.caption("Colunas: Data, Historico, Debito, Credito")
             st.download_button(
                 " Baixar Exemplo",
-                data=_gerar_exemplo_extrato(),
+                data=_EX_EXTRATO_BYTES,
                 file_name="EXEMPLO_Extrato_Bancario.xlsx",
                 mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
                 key="ex_ext_trad"
@@ -306,23 +435,17 @@ def mostrar_pagina_tradicao():
     # ==========================================================================
     if arquivos_ok and tem_extrato:
         try:
-            contas = carregar_contas_contabeis(contas_file)
-            movimentacao = carregar_planilha_movimentacao(mov_file)
+            contas = _load_contas_resource(contas_file.getvalue())
+            movimentacao = _load_movimentacao(mov_file.getvalue())
 
             df_extrato_sicoob = None
             df_extrato_bb = None
 
             if extrato_sicoob:
-                if tipo_sicoob == "PDF" and PDF_AVAILABLE:
-                    df_extrato_sicoob = processar_pdf_extrato(extrato_sicoob, 'SICOOB')
-                else:
-                    df_extrato_sicoob = carregar_extrato(extrato_sicoob, 'SICOOB')
+                df_extrato_sicoob = _extrato_da_sessao(extrato_sicoob, 'SICOOB', tipo_sicoob == "PDF" and PDF_SUPORTADO)
 
             if extrato_bb:
-                if tipo_bb == "PDF" and PDF_AVAILABLE:
-                    df_extrato_bb = processar_pdf_extrato(extrato_bb, 'BB')
-                else:
-                    df_extrato_bb = carregar_extrato(extrato_bb, 'BB')
+                df_extrato_bb = _extrato_da_sessao(extrato_bb, 'BB', tipo_bb == "PDF" and PDF_SUPORTADO)
 
         except Exception as e:
             st.error(f" Erro na leitura: {e}")
@@ -333,9 +456,12 @@ def mostrar_pagina_tradicao():
             with tabs[1]:
                 st.header(" Pre-visualizacao dos Dados")
 
-                qtd_sicoob = len(movimentacao.get('pag_sicoob', pd.DataFrame()))
-                qtd_bb = len(movimentacao.get('pag_bb', pd.DataFrame()))
-                qtd_caixa = len(movimentacao.get('caixa_saidas', pd.DataFrame()))
+                vazio = pd.DataFrame()
+                df_pag_sicoob = movimentacao.get('pag_sicoob', vazio)
+                df_pag_bb = movimentacao.get('pag_bb', vazio)
+                qtd_sicoob = len(df_pag_sicoob)
+                qtd_bb = len(df_pag_bb)
+                qtd_caixa = len(movimentacao.get('caixa_saidas', vazio))
 
                 col_m1, col_m2, col_m3, col_m4 = st.columns(4)
                 with col_m1:
@@ -352,29 +478,27 @@ def mostrar_pagina_tradicao():
                 col1, col2 = st.columns(2)
                 with col1:
                     st.subheader(" Movimentacao SICOOB")
-                    df_pag_sicoob = movimentacao.get('pag_sicoob', pd.DataFrame())
-                    if not df_pag_sicoob.empty:
-                        st.dataframe(df_pag_sicoob.head(10), use_container_width=True)
+                    if qtd_sicoob:
+                        st.dataframe(_preview(df_pag_sicoob), use_container_width=True)
                     else:
                         st.info("Sem dados")
 
                     st.subheader(" Movimentacao BB")
-                    df_pag_bb = movimentacao.get('pag_bb', pd.DataFrame())
-                    if not df_pag_bb.empty:
-                        st.dataframe(df_pag_bb.head(10), use_container_width=True)
+                    if qtd_bb:
+                        st.dataframe(_preview(df_pag_bb), use_container_width=True)
                     else:
                         st.info("Sem dados")
 
                 with col2:
                     st.subheader(" Extrato SICOOB")
                     if df_extrato_sicoob is not None and not df_extrato_sicoob.empty:
-                        st.dataframe(df_extrato_sicoob.head(10), use_container_width=True)
+                        st.dataframe(_preview(df_extrato_sicoob), use_container_width=True)
                     else:
                         st.info("Sem extrato SICOOB")
 
                     st.subheader(" Extrato BB")
                     if df_extrato_bb is not None and not df_extrato_bb.empty:
-                        st.dataframe(df_extrato_bb.head(10), use_container_width=True)
+                        st.dataframe(_preview(df_extrato_bb), use_container_width=True)
                     else:
                         st.info("Sem extrato BB")
 
@@ -382,14 +506,30 @@ def mostrar_pagina_tradicao():
             if btn:
                 with st.spinner("Processando conciliacao..."):
                     try:
-                        df_resultado, nao_encontrados = conciliar_tradicao(
-                            df_extrato_sicoob=df_extrato_sicoob,
-                            df_extrato_bb=df_extrato_bb,
-                            movimentacao=movimentacao,
-                            contas=contas
+                        df_resultado, nao_encontrados = _run_conciliacao(
+                            _md5(contas_file),
+                            _md5(mov_file),
+                            _md5(extrato_sicoob),
+                            _md5(extrato_bb),
+                            contas,
+                            movimentacao,
+                            df_extrato_sicoob,
+                            df_extrato_bb,
                         )
                         st.session_state['trad_resultado'] = df_resultado
+                        # Versao sem a coluna interna _tipo, usada pelas abas Resultado e Export
+                        export_df = df_resultado.drop(columns="_tipo", errors="ignore")
+                        st.session_state['trad_export_df'] = export_df
+                        # xlsx montado aqui, junto do export_df; so existe se a exportacao for liberada
+                        st.session_state['trad_export_xlsx'] = (
+                            _build_xlsx_bytes(export_df) if not nao_encontrados and not export_df.empty else None
+                        )
                         st.session_state['trad_nao_encontrados'] = nao_encontrados
+                        df_nao_enc = pd.DataFrame(nao_encontrados)
+                        st.session_state['trad_nao_enc_df'] = df_nao_enc
+                        st.session_state['trad_nao_enc_counts'] = (
+                            df_nao_enc['Tipo'].value_counts() if 'Tipo' in df_nao_enc.columns else pd.Series(dtype=int)
+                        )
                     except Exception as e:
                         st.error(f" Erro ao processar: {e}")
                         import traceback
@@ -410,7 +550,8 @@ def mostrar_pagina_tradicao():
                     with col2:
                         st.metric(" Nao Classificados", total_nao_enc)
                     with col3:
-                        taxa = round((total_lanc / (total_lanc + total_nao_enc) * 100), 1) if (total_lanc + total_nao_enc) > 0 else 0
+                        total = total_lanc + total_nao_enc
+                        taxa = round(total_lanc * 100 / total, 1) if total else 0
                         st.metric(" Taxa Sucesso", f"{taxa}%")
                     with col4:
                         if total_nao_enc == 0:
@@ -418,10 +559,9 @@ def mostrar_pagina_tradicao():
                         else:
                             st.warning(" Pendencias")
 
-                    if not df_resultado.empty and '_tipo' in df_resultado.columns:
+                    if total_lanc and '_tipo' in df_resultado.columns:
                         tipos = df_resultado['_tipo'].value_counts()
-                        for tipo, qtd in tipos.items():
-                            st.write(f"**{tipo}**: {qtd} lancamentos")
+                        st.table(tipos.rename("Lancamentos").rename_axis("Tipo").to_frame())
                 else:
                     st.info(" Clique em Conciliar e Gerar CSV na aba Upload para processar.")
 
@@ -431,21 +571,23 @@ def mostrar_pagina_tradicao():
                     df_resultado = st.session_state['trad_resultado']
 
                     if not df_resultado.empty:
-                        export_df = df_resultado.drop(columns="_tipo", errors="ignore")
+                        export_df = st.session_state['trad_export_df']
 
                         st.subheader(" Previa do CSV Final")
                         st.dataframe(export_df.head(30), use_container_width=True)
 
+                        # Valor vem como texto com virgula decimal; converte a coluna de uma vez
+                        valor_num = pd.to_numeric(
+                            export_df['Valor'].astype(str).str.replace(',', '.', regex=False),
+                            errors='coerce'
+                        ).fillna(0)
+
                         col1, col2, col3 = st.columns(3)
                         with col1:
-                            total_debitos = export_df[export_df['Cod Conta Debito'] != '']['Valor'].apply(
-                                lambda x: float(str(x).replace(',', '.')) if x else 0
-                            ).sum()
+                            total_debitos = valor_num[export_df['Cod Conta Debito'] != ''].sum()
                             st.metric("Total Debitos", f"R$ {_fmt_val(total_debitos)}")
                         with col2:
-                            total_creditos = export_df[export_df['Cod Conta Credito'] != '']['Valor'].apply(
-                                lambda x: float(str(x).replace(',', '.')) if x else 0
-                            ).sum()
+                            total_creditos = valor_num[export_df['Cod Conta Credito'] != ''].sum()
                             st.metric("Total Creditos", f"R$ {_fmt_val(total_creditos)}")
                         with col3:
                             st.metric("Total Lancamentos", len(export_df))
@@ -464,12 +606,14 @@ def mostrar_pagina_tradicao():
                         st.error(f" **EXPORTACAO BLOQUEADA** - {len(nao_encontrados)} lancamentos nao classificados!")
                         st.warning("Cadastre as contas na aba Nao Classificados e processe novamente.")
                     elif not df_resultado.empty:
-                        export_df = df_resultado.drop(columns="_tipo", errors="ignore")
+                        export_df = st.session_state['trad_export_df']
                         st.success(" Pronto para exportar!")
 
                         col1, col2 = st.columns(2)
                         with col1:
-                            csv_data = export_df.to_csv(sep=";", index=False, encoding="utf-8-sig").encode("utf-8-sig")
+                            csv_buf = BytesIO()
+                            export_df.to_csv(csv_buf, sep=";", index=False, encoding="utf-8-sig")
+                            csv_data = csv_buf.getvalue()
                             st.download_button(
                                 " **Baixar CSV Final**",
                                 data=csv_data,
@@ -478,12 +622,9 @@ def mostrar_pagina_tradicao():
                                 type="primary"
                             )
                         with col2:
-                            buffer = BytesIO()
-                            with pd.ExcelWriter(buffer, engine="openpyxl") as writer:
-                                export_df.to_excel(writer, index=False, sheet_name="Conciliacao")
                             st.download_button(
                                 " Baixar Excel",
-                                data=buffer.getvalue(),
+                                data=st.session_state['trad_export_xlsx'],
                                 file_name="conciliacao_tradicao.xlsx",
                                 mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
                             )
@@ -501,18 +642,18 @@ def mostrar_pagina_tradicao():
                         st.error(f" {len(nao_encontrados)} lancamentos nao foram classificados!")
                         st.markdown("**Cadastre as contas contabeis para os seguintes lancamentos:**")
 
-                        df_nao_encontrados = pd.DataFrame(nao_encontrados)
+                        df_nao_encontrados = st.session_state['trad_nao_enc_df']
                         st.dataframe(df_nao_encontrados, use_container_width=True)
 
                         st.subheader(" Resumo por Tipo")
-                        tipos = df_nao_encontrados['Tipo'].value_counts()
-                        for tipo, qtd in tipos.items():
-                            st.write(f" **{tipo}**: {qtd}")
+                        tipos = st.session_state['trad_nao_enc_counts']
+                        st.table(tipos.rename("Lancamentos").rename_axis("Tipo").to_frame())
 
-                        csv_nao_enc = df_nao_encontrados.to_csv(sep=";", index=False, encoding="utf-8-sig")
+                        csv_nao_enc = BytesIO()
+                        df_nao_encontrados.to_csv(csv_nao_enc, sep=";", index=False, encoding="utf-8-sig")
                         st.download_button(
                             " Baixar nao classificados",
-                            data=csv_nao_enc.encode("utf-8-sig"),
+                            data=csv_nao_enc.getvalue(),
                             file_name="lancamentos_nao_classificados.csv",
                             mime="text/csv"
                         )
@@ -531,22 +672,21 @@ def mostrar_pagina_tradicao():
                     st.info(" Clique em Conciliar e Gerar CSV na aba Upload para processar.")
 
     else:
-        for i in range(1, 6):
-            with tabs[i]:
-                st.warning(" Faca upload de todos os arquivos na aba Upload Arquivos para continuar.")
-                
-                if i == 1:
-                    col1, col2 = st.columns(2)
-                    with col1:
-                        st.info("""
-                        **Arquivos necessarios:**
-                        - Contas Contabeis.xlsx (FINANCEIRO, BANCO DO BRASIL, SICOOB)
-                        - Movimentacao.xlsx (PAG SICOOB, PAG BB, CAIXA EMPRESA)
-                        - Pelo menos um extrato bancario (SICOOB ou BB)
-                        """)
-                    with col2:
-                        st.info("""
-                        **Formatos aceitos:**
-                        - Excel (.xlsx)
-                        - PDF (se disponivel)
-                        """)
\ No newline at end of file
+        _render_empty(tabs[1])
+        with tabs[1]:
+            col1, col2 = st.columns(2)
+            with col1:
+                st.info("""
+                **Arquivos necessarios:**
+                - Contas Contabeis.xlsx (FINANCEIRO, BANCO DO BRASIL, SICOOB)
+                - Movimentacao.xlsx (PAG SICOOB, PAG BB, CAIXA EMPRESA)
+                - Pelo menos um extrato bancario (SICOOB ou BB)
+                """)
+            with col2:
+                st.info("""
+                **Formatos aceitos:**
+                - Excel (.xlsx)
+                - PDF (se disponivel)
+                """)
+        for tab in tabs[2:]:
+            _render_empty(tab)
@@ -10,12 +10,13 @@ import sys
 import os
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-import io
+import hashlib
 from io import BytesIO
 from pathlib import Path
 from typing import Any, Dict, Optional, List
 
 import pandas as pd
+import pyarrow as pa
 import streamlit as st
 
 from vps.conciliador_vps import conciliar_vps
@@ -26,47 +27,152 @@ from vps.utils_vps import (
     fmt_valor,
 )
 
+try:
+    import xxhash
+    XXHASH_AVAILABLE = True
+except ImportError:
+    XXHASH_AVAILABLE = False
+
 
 # ============== Helpers locais (UI) ==============
 def _fmt_val(v: float) -> str:
     return f"{float(v):0.2f}".replace(".", ",")
 
 
+# Colunas do CSV final, na ordem de exportacao, com o cabecalho de cada uma
+_COLUNAS_CSV = {
+    'DATA': 'Data',
+    'COD_CONTA_DEBITO': 'Cod. Conta Debito',
+    'COD_CONTA_CREDITO': 'Cod. Conta Credito',
+    'VALOR': 'Valor',
+    'COD_HISTORICO': 'Cod. Historico',
+    'COMPLEMENTO': 'Complemento Historico',
+    'INICIA_LOTE': 'Inicia Lote',
+}
+
+# Linhas enviadas ao navegador por tabela, salvo quando o usuario pede todas
+_LINHAS_PREVIEW = 500
+
+
+# ============== CACHE DE PLANILHAS ==============
+# As planilhas carregadas ficam em st.cache_data, indexadas pelo hash do
+# conteudo do upload: trocar de aba ou mexer nos filtros nao relê os XLSX.
+# O pandas le de um BytesIO novo, sem depender da posicao do buffer do upload.
+def _hash_arquivo(arquivo: Any) -> str:
+    if XXHASH_AVAILABLE:
+        return xxhash.xxh3_64_hexdigest(arquivo.getvalue())
+    return hashlib.md5(arquivo.getvalue()).hexdigest()
+
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def _contas_por_hash(hash_arquivo: str, _arquivo: Any) -> Dict[str, pd.DataFrame]:
+    return carregar_contas_contabeis(BytesIO(_arquivo.getvalue()))
+
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def _lancamentos_por_hash(hash_arquivo: str, _arquivo: Any) -> pd.DataFrame:
+    return carregar_lancamentos(BytesIO(_arquivo.getvalue()))
+
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def _extratos_por_hash(hash_arquivo: str, _arquivo: Any) -> pd.DataFrame:
+    return carregar_extratos(BytesIO(_arquivo.getvalue()))
+
+
+# Resultado da conciliacao indexado pelos hashes dos uploads; as planilhas em
+# si (argumentos com _) ficam fora da chave do cache.
+@st.cache_data(show_spinner=False, max_entries=4)
+def _run_conciliacao(
+    contas_hash: str,
+    lancamentos_hash: str,
+    extratos_hash: str,
+    _contas: Dict[str, pd.DataFrame],
+    _df_lancamentos: pd.DataFrame,
+    _df_extratos: pd.DataFrame,
+):
+    return conciliar_vps(
+        df_lancamentos=_df_lancamentos,
+        df_extrato=_df_extratos,
+        contas_contabeis=_contas
+    )
+
+
+# Totais exibidos na aba Avancado, calculados uma vez por par de uploads
+@st.cache_data(show_spinner=False, max_entries=8)
+def _resumo_planilhas(
+    lancamentos_hash: str,
+    extratos_hash: str,
+    _df_lancamentos: pd.DataFrame,
+    _df_extratos: pd.DataFrame,
+) -> Dict[str, Any]:
+    resumo: Dict[str, Any] = {
+        'total_pago': _df_lancamentos['VALOR_PAGO'].sum() if 'VALOR_PAGO' in _df_lancamentos.columns else 0,
+        'total_juros': _df_lancamentos['JUROS_MULTAS'].sum() if 'JUROS_MULTAS' in _df_lancamentos.columns else 0,
+        'bancos': len(_df_lancamentos['BANCO'].value_counts()) if 'BANCO' in _df_lancamentos.columns else None,
+        'total_creditos': None,
+        'total_debitos': None,
+    }
+    if 'TIPO_MOVIMENTO' in _df_extratos.columns and 'VALOR_ABS' in _df_extratos.columns:
+        # Uma unica passada sobre o extrato para creditos e debitos
+        por_tipo = _df_extratos.groupby('TIPO_MOVIMENTO', observed=True)['VALOR_ABS'].sum()
+        resumo['total_creditos'] = por_tipo.get('CREDITO', 0.0)
+        resumo['total_debitos'] = por_tipo.get('DEBITO', 0.0)
+    return resumo
+
+
+def _metricas_resultado(df_resultado: pd.DataFrame) -> Dict[str, Any]:
+    """Mascaras por STATUS, contagem de lancamentos OK e taxa de sucesso do resultado."""
+    if 'STATUS' in df_resultado.columns:
+        mascara_ok = df_resultado['STATUS'].eq('OK').to_numpy()
+        mascara_nao_class = df_resultado['STATUS'].eq('NAO_CLASSIFICADO').to_numpy()
+        ok = int(mascara_ok.sum())
+    else:
+        mascara_ok = mascara_nao_class = None
+        ok = len(df_resultado)
+    taxa = (ok / len(df_resultado) * 100) if len(df_resultado) > 0 else 0
+    return {'ok': ok, 'taxa': taxa, 'mascara_ok': mascara_ok, 'mascara_nao_class': mascara_nao_class}
+
+
+def _tabela_arrow(df: pd.DataFrame) -> pa.Table:
+    """Converte o resultado para Arrow uma unica vez, para exibicao.
+
+    Colunas com tipos mistos (ex.: conta como int ou '') viram texto, como o
+    st.dataframe faria a cada rerun ao falhar na conversao.
+    """
+    mistas = {
+        c: 'string' for c in df.columns
+        if df[c].dtype == object and pd.api.types.infer_dtype(df[c], skipna=True) in ('mixed', 'mixed-integer')
+    }
+    return pa.Table.from_pandas(df.astype(mistas), preserve_index=False)
+
+
 # ============== PLANILHAS EXEMPLO ==============
-def _gerar_exemplo_contas_contabeis() -> bytes:
-    """Gera planilha exemplo de Contas Contabeis com 4 abas."""
-    df_financeiro = pd.DataFrame({
+# Conteudo das planilhas exemplo (aba -> dados), montado uma vez por processo
+_EXEMPLO_CONTAS: Dict[str, pd.DataFrame] = {
+    'RELATORIO FINANCEIRO': pd.DataFrame({
         'LANCAMENTOS': ['FORNECEDOR ABC LTDA', 'DISTRIBUIDORA XYZ', 'ATACADO NORTE', 'SERVICOS GERAIS'],
         'CONTAS': [101, 102, 103, 104],
         'HISTORICO': [34, 34, 34, 34],
-    })
-    df_sicoob = pd.DataFrame({
+    }),
+    'SICOOB': pd.DataFrame({
         'LANCAMENTOS': ['TARIFA MENSAL', 'IOF', 'PIX RECEBIDO', 'TED RECEBIDA'],
         'CONTAS': [170, 171, 5, 5],
         'Historico': [11, 11, 2, 2],
-    })
-    df_bradesco = pd.DataFrame({
+    }),
+    'BRADESCO': pd.DataFrame({
         'LANCAMENTOS': ['TARIFA PACOTE', 'DEB PACOTE SERVICOS', 'PIX RECEBIDO', 'DEPOSITO'],
         'CONTAS': [170, 170, 5, 5],
         'Historico': [11, 11, 2, 9],
-    })
-    df_sicredi = pd.DataFrame({
+    }),
+    'SICREDI': pd.DataFrame({
         'LANCAMENTOS': ['TARIFA MENSAL', 'TAC', 'TED RECEBIDA', 'PIX RECEBIDO'],
         'CONTAS': [170, 170, 5, 5],
         'Historico': [11, 11, 2, 2],
-    })
-    buffer = BytesIO()
-    with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
-        df_financeiro.to_excel(writer, index=False, sheet_name='RELATORIO FINANCEIRO')
-        df_sicoob.to_excel(writer, index=False, sheet_name='SICOOB')
-        df_bradesco.to_excel(writer, index=False, sheet_name='BRADESCO')
-        df_sicredi.to_excel(writer, index=False, sheet_name='SICREDI')
-    return buffer.getvalue()
-
+    }),
+}
 
-def _gerar_exemplo_lancamentos() -> bytes:
-    """Gera planilha exemplo de Lancamentos."""
-    df = pd.DataFrame({
+_EXEMPLO_LANCAMENTOS: Dict[str, pd.DataFrame] = {
+    'LANCAMENTOS': pd.DataFrame({
         'FORNECEDOR': ['FORNECEDOR ABC LTDA', 'DISTRIBUIDORA XYZ', 'ATACADO NORTE'],
         'NF': ['12345', '67890', '11111'],
         'Vencimento ': ['01/11/2025', '02/11/2025', '03/11/2025'],
@@ -76,26 +182,44 @@ def _gerar_exemplo_lancamentos() -> bytes:
         'Forma de Pagamento ': ['PIX', 'BOLETO', 'PIX'],
         'Data de \npagamento': ['01/11/2025', '02/11/2025', '03/11/2025'],
         'PAGAMENTO': ['SICOOB', 'BRADESCO', 'SICREDI'],
-    })
-    buffer = BytesIO()
-    with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
-        df.to_excel(writer, index=False, sheet_name='LANCAMENTOS')
-    return buffer.getvalue()
+    }),
+}
 
-
-def _gerar_exemplo_extratos() -> bytes:
-    """Gera planilha exemplo de Extratos."""
-    df = pd.DataFrame({
+_EXEMPLO_EXTRATOS: Dict[str, pd.DataFrame] = {
+    'EXTRATOS': pd.DataFrame({
         'DATA': ['01/11/2025', '02/11/2025', '03/11/2025', '04/11/2025', '05/11/2025'],
         'HISTORICO': ['PIX ENVIADO FORNECEDOR ABC', 'PAG BOLETO DISTRIBUIDORA', 'TED ENVIADA ATACADO', 'TARIFA PACOTE SERVICOS', 'PIX RECEBIDO CLIENTE'],
         'VALOR': ['1.500,00D', '2.316,00D', '890,00D', '45,00D', '800,00C'],
-    })
+    }),
+}
+
+
+def _planilha_xlsx(abas: Dict[str, pd.DataFrame]) -> bytes:
     buffer = BytesIO()
-    with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
-        df.to_excel(writer, index=False, sheet_name='EXTRATOS')
+    with pd.ExcelWriter(buffer, engine='xlsxwriter') as writer:
+        for nome, df in abas.items():
+            df.to_excel(writer, index=False, sheet_name=nome)
     return buffer.getvalue()
 
 
+@st.cache_data(show_spinner=False)
+def _gerar_exemplo_contas_contabeis() -> bytes:
+    """Gera planilha exemplo de Contas Contabeis com 4 abas."""
+    return _planilha_xlsx(_EXEMPLO_CONTAS)
+
+
+@st.cache_data(show_spinner=False)
+def _gerar_exemplo_lancamentos() -> bytes:
+    """Gera planilha exemplo de Lancamentos."""
+    return _planilha_xlsx(_EXEMPLO_LANCAMENTOS)
+
+
+@st.cache_data(show_spinner=False)
+def _gerar_exemplo_extratos() -> bytes:
+    """Gera planilha exemplo de Extratos."""
+    return _planilha_xlsx(_EXEMPLO_EXTRATOS)
+
+
 # ============== PAGINA VPS ==============
 def mostrar_pagina_vps():
     """Renderiza a pagina de conciliacao da VPS METALURGICA."""
@@ -259,53 +383,46 @@ def mostrar_pagina_vps():
     if arquivos_ok:
         try:
             # Carrega arquivos
-            contas = carregar_contas_contabeis(contas_file)
-            df_lancamentos = carregar_lancamentos(lancamentos_file)
-            df_extratos = carregar_extratos(extratos_file)
+            contas_hash = _hash_arquivo(contas_file)
+            lancamentos_hash = _hash_arquivo(lancamentos_file)
+            extratos_hash = _hash_arquivo(extratos_file)
+            contas = _contas_por_hash(contas_hash, contas_file)
+            df_lancamentos = _lancamentos_por_hash(lancamentos_hash, lancamentos_file)
+            df_extratos = _extratos_por_hash(extratos_hash, extratos_file)
 
             # Salva no session_state
             st.session_state['vps_contas'] = contas
             st.session_state['vps_lancamentos'] = df_lancamentos
             st.session_state['vps_extratos'] = df_extratos
+            st.session_state['vps_resumo'] = _resumo_planilhas(
+                lancamentos_hash, extratos_hash, df_lancamentos, df_extratos
+            )
 
             # Logica do botao CONCILIAR
             if btn:
                 with st.spinner("Processando conciliacao..."):
                     try:
                         # Executa conciliacao
-                        df_resultado, stats = conciliar_vps(
-                            df_lancamentos=df_lancamentos.copy(),
-                            df_extrato=df_extratos.copy(),
-                            contas_contabeis=contas
+                        df_resultado, stats = _run_conciliacao(
+                            contas_hash, lancamentos_hash, extratos_hash,
+                            contas, df_lancamentos, df_extratos
                         )
 
                         # Salva resultados
                         st.session_state['vps_resultado'] = df_resultado
                         st.session_state['vps_stats'] = stats
+                        metricas = _metricas_resultado(df_resultado)
+                        st.session_state['vps_metricas'] = metricas
+                        st.session_state['vps_resultado_arrow'] = _tabela_arrow(df_resultado)
 
                         # Gerar CSV
                         if not df_resultado.empty:
-                            # Prepara CSV
-                            df_csv = df_resultado.copy()
-                            colunas_padrao = ['DATA', 'COD_CONTA_DEBITO', 'COD_CONTA_CREDITO', 'VALOR', 'COD_HISTORICO', 'COMPLEMENTO', 'INICIA_LOTE']
-                            df_csv = df_csv[[c for c in colunas_padrao if c in df_csv.columns]]
-
-                            if 'STATUS' in df_resultado.columns:
-                                df_csv = df_resultado[df_resultado['STATUS'] == 'OK'][[c for c in colunas_padrao if c in df_resultado.columns]]
-
-                            df_csv = df_csv.rename(columns={
-                                'DATA': 'Data',
-                                'COD_CONTA_DEBITO': 'Cod. Conta Debito',
-                                'COD_CONTA_CREDITO': 'Cod. Conta Credito',
-                                'VALOR': 'Valor',
-                                'COD_HISTORICO': 'Cod. Historico',
-                                'COMPLEMENTO': 'Complemento Historico',
-                                'INICIA_LOTE': 'Inicia Lote'
-                            })
-
-                            csv_buffer = io.BytesIO()
-                            df_csv.to_csv(csv_buffer, index=False, sep=';', encoding='utf-8-sig')
-                            csv_data = csv_buffer.getvalue()
+                            # Prepara CSV (apenas lancamentos classificados)
+                            colunas = [c for c in _COLUNAS_CSV if c in df_resultado.columns]
+                            linhas = metricas['mascara_ok'] if metricas['mascara_ok'] is not None else slice(None)
+                            df_csv = df_resultado.loc[linhas, colunas].rename(columns=_COLUNAS_CSV)
+
+                            csv_data = df_csv.to_csv(index=False, sep=';').encode('utf-8-sig')
 
                             st.session_state['vps_csv_data'] = csv_data
                             st.session_state['vps_csv_filename'] = f"lancamentos_vps_{pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')}.csv"
@@ -330,6 +447,10 @@ def mostrar_pagina_vps():
         if 'vps_resultado' in st.session_state:
             df_resultado = st.session_state['vps_resultado']
             stats = st.session_state['vps_stats']
+            metricas = st.session_state.get('vps_metricas') or _metricas_resultado(df_resultado)
+            tabela = st.session_state.get('vps_resultado_arrow')
+            if tabela is None:
+                tabela = _tabela_arrow(df_resultado)
 
             # Dashboard de metricas
             st.subheader("Dashboard de Conciliacao")
@@ -342,9 +463,7 @@ def mostrar_pagina_vps():
             with col3:
                 st.metric("Nao Classificados", stats['nao_classificados'])
             with col4:
-                ok = len(df_resultado[df_resultado.get('STATUS', 'OK') == 'OK']) if 'STATUS' in df_resultado.columns else len(df_resultado)
-                taxa = (ok / len(df_resultado) * 100) if len(df_resultado) > 0 else 0
-                st.metric("Taxa Sucesso", f"{taxa:.1f}%")
+                st.metric("Taxa Sucesso", f"{metricas['taxa']:.1f}%")
 
             st.divider()
 
@@ -356,16 +475,17 @@ def mostrar_pagina_vps():
 
             if 'STATUS' in df_resultado.columns:
                 if filtro == "Classificados":
-                    df_exibir = df_resultado[df_resultado['STATUS'] == 'OK']
+                    tabela_exibir = tabela.filter(metricas['mascara_ok'])
                 elif filtro == "Nao Classificados":
-                    df_exibir = df_resultado[df_resultado['STATUS'] == 'NAO_CLASSIFICADO']
+                    tabela_exibir = tabela.filter(metricas['mascara_nao_class'])
                 else:
-                    df_exibir = df_resultado
+                    tabela_exibir = tabela
             else:
-                df_exibir = df_resultado
+                tabela_exibir = tabela
 
-            st.dataframe(df_exibir, use_container_width=True, height=400)
-            st.caption(f"Exibindo {len(df_exibir)} de {len(df_resultado)} lancamentos")
+            todas = st.checkbox("Mostrar todas as linhas", key="vps_todas_resultado")
+            st.dataframe(tabela_exibir if todas else tabela_exibir.slice(0, _LINHAS_PREVIEW), use_container_width=True, height=400)
+            st.caption(f"Exibindo {tabela_exibir.num_rows} de {len(df_resultado)} lancamentos")
 
             st.divider()
 
@@ -375,15 +495,13 @@ def mostrar_pagina_vps():
                 st.warning("Os itens abaixo nao foram encontrados no plano de contas:")
 
                 if 'STATUS' in df_resultado.columns:
-                    df_nao_class = df_resultado[df_resultado['STATUS'] == 'NAO_CLASSIFICADO'].copy()
-                    st.dataframe(df_nao_class, use_container_width=True)
+                    df_nao_class = df_resultado[metricas['mascara_nao_class']]
+                    st.dataframe(tabela.filter(metricas['mascara_nao_class']), use_container_width=True)
 
                     # Botao para baixar nao classificados
-                    csv_buffer = io.BytesIO()
-                    df_nao_class.to_csv(csv_buffer, index=False, sep=';', encoding='utf-8-sig')
                     st.download_button(
                         "Baixar Nao Classificados",
-                        data=csv_buffer.getvalue(),
+                        data=df_nao_class.to_csv(index=False, sep=';').encode('utf-8-sig'),
                         file_name="lancamentos_nao_classificados_vps.csv",
                         mime="text/csv"
                     )
@@ -403,8 +521,7 @@ def mostrar_pagina_vps():
 
             # Analise de qualidade
             st.subheader("Analise de Qualidade")
-            ok = len(df_resultado[df_resultado.get('STATUS', 'OK') == 'OK']) if 'STATUS' in df_resultado.columns else len(df_resultado)
-            pct_ok = (ok / len(df_resultado) * 100) if len(df_resultado) > 0 else 0
+            pct_ok = metricas['taxa']
 
             if pct_ok >= 95:
                 st.success(f"**Excelente**: {pct_ok:.1f}% dos lancamentos classificados")
@@ -422,50 +539,48 @@ def mostrar_pagina_vps():
     # ====== TAB 2: AVANCADO ======
     with tabs[2]:
         if 'vps_lancamentos' in st.session_state:
+            resumo = st.session_state['vps_resumo']
             st.header("Configuracoes Avancadas")
 
             st.divider()
 
             # Pre-visualizacao expandida dos dados
             st.subheader("Pre-visualizacao dos Dados")
+            todas = st.checkbox("Mostrar todas as linhas", key="vps_todas_preview")
+            linhas = None if todas else _LINHAS_PREVIEW
 
             # Lancamentos
             if 'vps_lancamentos' in st.session_state:
                 with st.expander("Lancamentos (completo)", expanded=False):
                     df_lanc = st.session_state['vps_lancamentos']
-                    st.dataframe(df_lanc, use_container_width=True, height=400)
+                    st.dataframe(_tabela_arrow(df_lanc.iloc[:linhas]), use_container_width=True, height=400)
                     st.caption(f"Total: {len(df_lanc)} registros")
 
                     # Estatisticas
                     col1, col2, col3 = st.columns(3)
                     with col1:
-                        total_pago = df_lanc['VALOR_PAGO'].sum() if 'VALOR_PAGO' in df_lanc.columns else 0
-                        st.metric("Total Pago", f"R$ {_fmt_val(total_pago)}")
+                        st.metric("Total Pago", f"R$ {_fmt_val(resumo['total_pago'])}")
                     with col2:
-                        total_juros = df_lanc['JUROS_MULTAS'].sum() if 'JUROS_MULTAS' in df_lanc.columns else 0
-                        st.metric("Total Juros/Multas", f"R$ {_fmt_val(total_juros)}")
+                        st.metric("Total Juros/Multas", f"R$ {_fmt_val(resumo['total_juros'])}")
                     with col3:
-                        if 'BANCO' in df_lanc.columns:
-                            bancos = df_lanc['BANCO'].value_counts()
-                            st.metric("Bancos Utilizados", len(bancos))
+                        if resumo['bancos'] is not None:
+                            st.metric("Bancos Utilizados", resumo['bancos'])
 
             # Extratos
             if 'vps_extratos' in st.session_state:
                 with st.expander("Extratos Bancarios (completo)", expanded=False):
                     df_ext = st.session_state['vps_extratos']
-                    st.dataframe(df_ext, use_container_width=True, height=400)
+                    st.dataframe(_tabela_arrow(df_ext.iloc[:linhas]), use_container_width=True, height=400)
                     st.caption(f"Total: {len(df_ext)} movimentacoes")
 
                     # Estatisticas
                     col1, col2 = st.columns(2)
                     with col1:
-                        if 'TIPO_MOVIMENTO' in df_ext.columns and 'VALOR_ABS' in df_ext.columns:
-                            total_creditos = df_ext[df_ext['TIPO_MOVIMENTO'] == 'CREDITO']['VALOR_ABS'].sum()
-                            st.metric("Total Creditos", f"R$ {_fmt_val(total_creditos)}")
+                        if resumo['total_creditos'] is not None:
+                            st.metric("Total Creditos", f"R$ {_fmt_val(resumo['total_creditos'])}")
                     with col2:
-                        if 'TIPO_MOVIMENTO' in df_ext.columns and 'VALOR_ABS' in df_ext.columns:
-                            total_debitos = df_ext[df_ext['TIPO_MOVIMENTO'] == 'DEBITO']['VALOR_ABS'].sum()
-                            st.metric("Total Debitos", f"R$ {_fmt_val(total_debitos)}")
+                        if resumo['total_debitos'] is not None:
+                            st.metric("Total Debitos", f"R$ {_fmt_val(resumo['total_debitos'])}")
 
             # Contas Contabeis
             if 'vps_contas' in st.session_state:
@@ -475,7 +590,7 @@ def mostrar_pagina_vps():
                         for aba_nome, df_aba in contas.items():
                             if df_aba is not None and isinstance(df_aba, pd.DataFrame):
                                 st.markdown(f"**{aba_nome}**")
-                                st.dataframe(df_aba, use_container_width=True, height=200)
+                                st.dataframe(_tabela_arrow(df_aba.iloc[:linhas]), use_container_width=True, height=200)
                                 st.caption(f"Total: {len(df_aba)} registros")
                                 st.divider()
 
@@ -7,9 +7,10 @@ from __future__ import annotations
 
 import sys
 import os
-sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+_AQUI = os.path.dirname(os.path.abspath(__file__))
+if _AQUI not in sys.path:
+    sys.path.insert(0, _AQUI)
 
-import io
 from io import BytesIO
 from pathlib import Path
 from typing import Any, Dict, Optional, List
@@ -27,49 +28,86 @@ from vps.utils_vps import (
 
 
 # ============== Helpers locais (UI) ==============
+# Limite de linhas enviadas ao navegador nas visualizacoes das contas
+_LINHAS_PREVIEW = 500
+
+
 def _fmt_val(v: float) -> str:
     return f"{float(v):0.2f}".replace(".", ",")
 
 
+def _resumo_lancamentos(df_lancamentos: pd.DataFrame) -> Dict[str, Any]:
+    """Totais da pre-visualizacao, calculados uma vez por upload."""
+    return {
+        'total_pago': df_lancamentos['VALOR_PAGO'].sum() if 'VALOR_PAGO' in df_lancamentos.columns else 0,
+        'total_juros': df_lancamentos['JUROS_MULTAS'].sum() if 'JUROS_MULTAS' in df_lancamentos.columns else 0,
+        'bancos': int(df_lancamentos['BANCO'].nunique()) if 'BANCO' in df_lancamentos.columns else 0,
+    }
+
+
+def _resumo_extratos(df_extratos: pd.DataFrame) -> Optional[Dict[str, float]]:
+    """Creditos e debitos do extrato numa unica passada (None sem as colunas)."""
+    if 'TIPO_MOVIMENTO' not in df_extratos.columns or 'VALOR_ABS' not in df_extratos.columns:
+        return None
+    por_tipo = df_extratos.groupby('TIPO_MOVIMENTO', observed=True)['VALOR_ABS'].sum()
+    return {
+        'total_creditos': por_tipo.get('CREDITO', 0.0),
+        'total_debitos': por_tipo.get('DEBITO', 0.0),
+    }
+
+
+# ============== LEITURA COM CACHE ==============
+# Chaveadas pelos bytes do upload (o objeto UploadedFile muda a cada rerun) e
+# limitadas como os loaders _*_por_hash da pagina VPS: cada entrada guarda o
+# arquivo inteiro na chave, entao o cache nao pode crescer sem limite.
+@st.cache_data(show_spinner=False, max_entries=8)
+def _load_contas(file_bytes: bytes) -> Dict[str, pd.DataFrame]:
+    return carregar_contas_contabeis(BytesIO(file_bytes))
+
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def _load_lancamentos(file_bytes: bytes) -> pd.DataFrame:
+    return carregar_lancamentos(BytesIO(file_bytes))
+
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def _load_extratos(file_bytes: bytes) -> pd.DataFrame:
+    return carregar_extratos(BytesIO(file_bytes))
+
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def _build_csv_bytes(df: pd.DataFrame) -> bytes:
+    """CSV em Windows-1252 (padrao dos softwares contabeis), gerado uma vez por conteudo."""
+    return df.to_csv(index=False, sep=';').encode('cp1252', errors='replace')
+
+
 # ============== PLANILHAS EXEMPLO ==============
-def _gerar_exemplo_contas_contabeis() -> bytes:
-    """Gera planilha exemplo de Contas ContÃ¡beis com 4 abas."""
-    # Aba RELATORIO FINANCEIRO - fornecedores
-    df_financeiro = pd.DataFrame({
+# Conteudo das planilhas exemplo (aba -> dados), montado uma vez por processo
+_EXEMPLO_CONTAS: Dict[str, pd.DataFrame] = {
+    'RELATORIO FINANCEIRO': pd.DataFrame({
         'LANCAMENTOS': ['FORNECEDOR ABC LTDA', 'DISTRIBUIDORA XYZ', 'ATACADO NORTE', 'SERVICOS GERAIS'],
         'CONTAS': [101, 102, 103, 104],
         'HISTORICO': [34, 34, 34, 34],
-    })
-    # Aba SICOOB - cadastro por histÃ³rico
-    df_sicoob = pd.DataFrame({
+    }),
+    'SICOOB': pd.DataFrame({
         'LANCAMENTOS': ['TARIFA MENSAL', 'IOF', 'PIX RECEBIDO', 'TED RECEBIDA'],
         'CONTAS': [170, 171, 5, 5],
         'Historico': [11, 11, 2, 2],
-    })
-    # Aba BRADESCO - cadastro por histÃ³rico
-    df_bradesco = pd.DataFrame({
+    }),
+    'BRADESCO': pd.DataFrame({
         'LANCAMENTOS': ['TARIFA PACOTE', 'DEB PACOTE SERVICOS', 'PIX RECEBIDO', 'DEPOSITO'],
         'CONTAS': [170, 170, 5, 5],
         'Historico': [11, 11, 2, 9],
-    })
-    # Aba SICREDI - cadastro por histÃ³rico
-    df_sicredi = pd.DataFrame({
+    }),
+    'SICREDI': pd.DataFrame({
         'LANCAMENTOS': ['TARIFA MENSAL', 'TAC', 'TED RECEBIDA', 'PIX RECEBIDO'],
         'CONTAS': [170, 170, 5, 5],
         'Historico': [11, 11, 2, 2],
-    })
-    buffer = BytesIO()
-    with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
-        df_financeiro.to_excel(writer, index=False, sheet_name='RELATORIO FINANCEIRO')
-        df_sicoob.to_excel(writer, index=False, sheet_name='SICOOB')
-        df_bradesco.to_excel(writer, index=False, sheet_name='BRADESCO')
-        df_sicredi.to_excel(writer, index=False, sheet_name='SICREDI')
-    return buffer.getvalue()
+    }),
+}
 
-
-def _gerar_exemplo_lancamentos() -> bytes:
-    """Gera planilha exemplo de LanÃ§amentos."""
-    df = pd.DataFrame({
+_EXEMPLO_LANCAMENTOS: Dict[str, pd.DataFrame] = {
+    'LANCAMENTOS': pd.DataFrame({
         'FORNECEDOR': ['FORNECEDOR ABC LTDA', 'DISTRIBUIDORA XYZ', 'ATACADO NORTE'],
         'NF': ['12345', '67890', '11111'],
         'Vencimento ': ['01/11/2025', '02/11/2025', '03/11/2025'],
@@ -79,26 +117,44 @@ def _gerar_exemplo_lancamentos() -> bytes:
         'Forma de Pagamento ': ['PIX', 'BOLETO', 'PIX'],
         'Data de \npagamento': ['01/11/2025', '02/11/2025', '03/11/2025'],
         'PAGAMENTO': ['SICOOB', 'BRADESCO', 'SICREDI'],
-    })
-    buffer = BytesIO()
-    with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
-        df.to_excel(writer, index=False, sheet_name='LANCAMENTOS')
-    return buffer.getvalue()
-
+    }),
+}
 
-def _gerar_exemplo_extratos() -> bytes:
-    """Gera planilha exemplo de Extratos."""
-    df = pd.DataFrame({
+_EXEMPLO_EXTRATOS: Dict[str, pd.DataFrame] = {
+    'EXTRATOS': pd.DataFrame({
         'DATA': ['01/11/2025', '02/11/2025', '03/11/2025', '04/11/2025', '05/11/2025'],
         'HISTORICO': ['PIX ENVIADO FORNECEDOR ABC', 'PAG BOLETO DISTRIBUIDORA', 'TED ENVIADA ATACADO', 'TARIFA PACOTE SERVICOS', 'PIX RECEBIDO CLIENTE'],
         'VALOR': ['1.500,00D', '2.316,00D', '890,00D', '45,00D', '800,00C'],
-    })
+    }),
+}
+
+
+def _planilha_xlsx(abas: Dict[str, pd.DataFrame]) -> bytes:
     buffer = BytesIO()
-    with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
-        df.to_excel(writer, index=False, sheet_name='EXTRATOS')
+    with pd.ExcelWriter(buffer, engine='xlsxwriter') as writer:
+        for nome, df in abas.items():
+            df.to_excel(writer, index=False, sheet_name=nome)
     return buffer.getvalue()
 
 
+@st.cache_data(show_spinner=False, max_entries=1)
+def _gerar_exemplo_contas_contabeis() -> bytes:
+    """Gera planilha exemplo de Contas ContÃ¡beis com 4 abas."""
+    return _planilha_xlsx(_EXEMPLO_CONTAS)
+
+
+@st.cache_data(show_spinner=False, max_entries=1)
+def _gerar_exemplo_lancamentos() -> bytes:
+    """Gera planilha exemplo de LanÃ§amentos."""
+    return _planilha_xlsx(_EXEMPLO_LANCAMENTOS)
+
+
+@st.cache_data(show_spinner=False, max_entries=1)
+def _gerar_exemplo_extratos() -> bytes:
+    """Gera planilha exemplo de Extratos."""
+    return _planilha_xlsx(_EXEMPLO_EXTRATOS)
+
+
 # ============== PAGINA VPS ==============
 def mostrar_pagina_vps():
     """Renderiza a pÃ¡gina de conciliaÃ§Ã£o da VPS METALÃšRGICA."""
@@ -189,16 +245,18 @@ def mostrar_pagina_vps():
                 with st.spinner("Carregando arquivos..."):
                     try:
                         # Carrega contas contÃ¡beis
-                        contas = carregar_contas_contabeis(contas_file)
+                        contas = _load_contas(contas_file.getvalue())
                         st.session_state['vps_contas'] = contas
 
                         # Carrega lanÃ§amentos
-                        df_lancamentos = carregar_lancamentos(lancamentos_file)
+                        df_lancamentos = _load_lancamentos(lancamentos_file.getvalue())
                         st.session_state['vps_lancamentos'] = df_lancamentos
+                        st.session_state['vps_resumo_lancamentos'] = _resumo_lancamentos(df_lancamentos)
 
                         # Carrega extratos
-                        df_extratos = carregar_extratos(extratos_file)
+                        df_extratos = _load_extratos(extratos_file.getvalue())
                         st.session_state['vps_extratos'] = df_extratos
+                        st.session_state['vps_resumo_extratos'] = _resumo_extratos(df_extratos)
 
                         st.success("âœ… Arquivos carregados com sucesso!")
                         st.info(f"ðŸ“Š {len(df_lancamentos)} lanÃ§amentos e {len(df_extratos)} movimentaÃ§Ãµes de extrato carregadas.")
@@ -218,6 +276,8 @@ def mostrar_pagina_vps():
             contas = st.session_state.get('vps_contas')
             df_lancamentos = st.session_state.get('vps_lancamentos')
             df_extratos = st.session_state.get('vps_extratos')
+            resumo_lancamentos = st.session_state.get('vps_resumo_lancamentos')
+            resumo_extratos = st.session_state.get('vps_resumo_extratos')
             
             # Contas ContÃ¡beis
             st.subheader("ðŸ“‹ Contas ContÃ¡beis")
@@ -245,17 +305,11 @@ def mostrar_pagina_vps():
                 # EstatÃ­sticas
                 col1, col2, col3 = st.columns(3)
                 with col1:
-                    total_pago = df_lancamentos['VALOR_PAGO'].sum() if 'VALOR_PAGO' in df_lancamentos.columns else 0
-                    st.metric("Total Pago", f"R$ {_fmt_val(total_pago)}")
+                    st.metric("Total Pago", f"R$ {_fmt_val(resumo_lancamentos['total_pago'])}")
                 with col2:
-                    total_juros = df_lancamentos['JUROS_MULTAS'].sum() if 'JUROS_MULTAS' in df_lancamentos.columns else 0
-                    st.metric("Total Juros/Multas", f"R$ {_fmt_val(total_juros)}")
+                    st.metric("Total Juros/Multas", f"R$ {_fmt_val(resumo_lancamentos['total_juros'])}")
                 with col3:
-                    if 'BANCO' in df_lancamentos.columns:
-                        bancos = df_lancamentos['BANCO'].value_counts()
-                        st.metric("Bancos Utilizados", len(bancos))
-                    else:
-                        st.metric("Bancos Utilizados", 0)
+                    st.metric("Bancos Utilizados", resumo_lancamentos['bancos'])
             else:
                 st.warning("âš ï¸ Nenhum lanÃ§amento carregado")
 
@@ -270,15 +324,13 @@ def mostrar_pagina_vps():
                 # EstatÃ­sticas
                 col1, col2 = st.columns(2)
                 with col1:
-                    if 'TIPO_MOVIMENTO' in df_extratos.columns and 'VALOR_ABS' in df_extratos.columns:
-                        total_creditos = df_extratos[df_extratos['TIPO_MOVIMENTO'] == 'CREDITO']['VALOR_ABS'].sum()
-                        st.metric("Total CrÃ©ditos", f"R$ {_fmt_val(total_creditos)}")
+                    if resumo_extratos is not None:
+                        st.metric("Total CrÃ©ditos", f"R$ {_fmt_val(resumo_extratos['total_creditos'])}")
                     else:
                         st.metric("Total CrÃ©ditos", "R$ 0,00")
                 with col2:
-                    if 'TIPO_MOVIMENTO' in df_extratos.columns and 'VALOR_ABS' in df_extratos.columns:
-                        total_debitos = df_extratos[df_extratos['TIPO_MOVIMENTO'] == 'DEBITO']['VALOR_ABS'].sum()
-                        st.metric("Total DÃ©bitos", f"R$ {_fmt_val(total_debitos)}")
+                    if resumo_extratos is not None:
+                        st.metric("Total DÃ©bitos", f"R$ {_fmt_val(resumo_extratos['total_debitos'])}")
                     else:
                         st.metric("Total DÃ©bitos", "R$ 0,00")
             else:
@@ -288,13 +340,13 @@ def mostrar_pagina_vps():
 
             # Contas ContÃ¡beis
             st.subheader("ðŸ“š Contas ContÃ¡beis")
-            contas = st.session_state.get('vps_contas')
 
             if contas and isinstance(contas, dict):
                 for aba_nome, df_aba in contas.items():
                     if df_aba is not None and isinstance(df_aba, pd.DataFrame):
-                        with st.expander(f"Aba: {aba_nome}"):
-                            st.dataframe(df_aba, use_container_width=True)
+                        # Expander recolhido ainda serializa a tabela; so renderiza sob demanda
+                        if st.checkbox(f"Expandir {aba_nome}"):
+                            st.dataframe(df_aba.head(_LINHAS_PREVIEW), use_container_width=True, height=300)
                             st.caption(f"Total: {len(df_aba)} registros")
             else:
                 st.warning("âš ï¸ Contas contÃ¡beis nÃ£o carregadas corretamente")
@@ -340,9 +392,10 @@ def mostrar_pagina_vps():
                             st.stop()
 
                         # Executa conciliaÃ§Ã£o
+                        # conciliar_vps nao altera as entradas (trabalha sobre df_extrato.assign)
                         df_resultado, stats = conciliar_vps(
-                            df_lancamentos=df_lancamentos.copy(),
-                            df_extrato=df_extratos.copy(),
+                            df_lancamentos=df_lancamentos,
+                            df_extrato=df_extratos,
                             contas_contabeis=contas
                         )
 
@@ -350,6 +403,11 @@ def mostrar_pagina_vps():
                         st.session_state['vps_resultado'] = df_resultado
                         st.session_state['vps_stats'] = stats
 
+                        # Mascaras de STATUS calculadas uma vez por conciliacao
+                        status = df_resultado.get('STATUS', pd.Series('OK', index=df_resultado.index))
+                        st.session_state['vps_mask_ok'] = (status == 'OK').to_numpy()
+                        st.session_state['vps_mask_nc'] = (status == 'NAO_CLASSIFICADO').to_numpy()
+
                         st.success("âœ… ConciliaÃ§Ã£o concluÃ­da!")
 
                         # Exibe estatÃ­sticas
@@ -384,6 +442,8 @@ def mostrar_pagina_vps():
         else:
             df_resultado = st.session_state['vps_resultado']
             stats = st.session_state['vps_stats']
+            mask_ok = st.session_state['vps_mask_ok']
+            mask_nc = st.session_state['vps_mask_nc']
 
             # EstatÃ­sticas
             st.subheader("ðŸ“ˆ EstatÃ­sticas")
@@ -391,7 +451,7 @@ def mostrar_pagina_vps():
             with col1:
                 st.metric("Total de LanÃ§amentos", len(df_resultado))
             with col2:
-                ok = len(df_resultado[df_resultado.get('STATUS', 'OK') == 'OK'])
+                ok = int(mask_ok.sum())
                 st.metric("Classificados", ok)
             with col3:
                 nao_class = stats['nao_classificados']
@@ -408,9 +468,9 @@ def mostrar_pagina_vps():
             filtro = st.radio("Filtrar por:", ["Todos", "Classificados", "NÃ£o Classificados"], horizontal=True)
 
             if filtro == "Classificados":
-                df_exibir = df_resultado[df_resultado.get('STATUS', 'OK') == 'OK']
+                df_exibir = df_resultado.iloc[mask_ok]
             elif filtro == "NÃ£o Classificados":
-                df_exibir = df_resultado[df_resultado.get('STATUS', 'OK') == 'NAO_CLASSIFICADO']
+                df_exibir = df_resultado.iloc[mask_nc]
             else:
                 df_exibir = df_resultado
 
@@ -429,6 +489,7 @@ def mostrar_pagina_vps():
         else:
             df_resultado = st.session_state['vps_resultado']
             stats = st.session_state['vps_stats']
+            mask_ok = st.session_state['vps_mask_ok']
 
             if stats['nao_classificados'] > 0:
                 st.error(f"âŒ Existem {stats['nao_classificados']} lanÃ§amentos nÃ£o classificados!")
@@ -436,17 +497,13 @@ def mostrar_pagina_vps():
             else:
                 st.success("âœ… Todos os lanÃ§amentos foram classificados!")
 
-                # Prepara CSV
-                df_csv = df_resultado.copy()
-
-                # Remove colunas extras (mantÃ©m apenas formato padrÃ£o)
+                # Prepara CSV: apenas formato padrao e linhas com STATUS OK (se existir)
                 colunas_padrao = ['DATA', 'COD_CONTA_DEBITO', 'COD_CONTA_CREDITO', 'VALOR', 'COD_HISTORICO', 'COMPLEMENTO', 'INICIA_LOTE']
-                df_csv = df_csv[[c for c in colunas_padrao if c in df_csv.columns]]
-
-                # Remove linhas com STATUS != OK (se existir)
                 if 'STATUS' in df_resultado.columns:
-                    df_csv = df_resultado[df_resultado['STATUS'] == 'OK'][colunas_padrao]
-                
+                    df_csv = df_resultado.loc[mask_ok, colunas_padrao]
+                else:
+                    df_csv = df_resultado[[c for c in colunas_padrao if c in df_resultado.columns]]
+
                 # Renomeia colunas para o padrÃ£o do SICOOB.csv
                 df_csv = df_csv.rename(columns={
                     'DATA': 'Data',
@@ -458,10 +515,7 @@ def mostrar_pagina_vps():
                     'INICIA_LOTE': 'Inicia Lote'
                 })
 
-                # Converte para CSV com encoding Windows-1252 (padrÃ£o para softwares contÃ¡beis brasileiros)
-                csv_buffer = io.BytesIO()
-                df_csv.to_csv(csv_buffer, index=False, sep=';', encoding='cp1252', errors='replace')
-                csv_data = csv_buffer.getvalue()
+                csv_data = _build_csv_bytes(df_csv)
 
                 # Preview
                 st.subheader("ðŸ‘ï¸ Preview do CSV")
@@ -492,10 +546,11 @@ def mostrar_pagina_vps():
             st.warning("âš ï¸ Execute a conciliaÃ§Ã£o primeiro")
         else:
             df_resultado = st.session_state['vps_resultado']
+            mask_nc = st.session_state['vps_mask_nc']
 
             # Filtra nÃ£o classificados
             if 'STATUS' in df_resultado.columns:
-                df_nao_class = df_resultado[df_resultado['STATUS'] == 'NAO_CLASSIFICADO'].copy()
+                df_nao_class = df_resultado.iloc[mask_nc]
             else:
                 df_nao_class = pd.DataFrame()
 
@@ -518,9 +573,7 @@ def mostrar_pagina_vps():
                 st.dataframe(df_nao_class, use_container_width=True, height=400)
 
                 # Download CSV com nÃ£o classificados (encoding cp1252 para compatibilidade)
-                csv_buffer = io.BytesIO()
-                df_nao_class.to_csv(csv_buffer, index=False, sep=';', encoding='cp1252', errors='replace')
-                csv_data = csv_buffer.getvalue()
+                csv_data = _build_csv_bytes(df_nao_class)
 
                 st.download_button(
                     label="ðŸ“¥ Baixar Lista de NÃ£o Classificados",
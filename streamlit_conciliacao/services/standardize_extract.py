@@ -3,12 +3,23 @@ Módulo para padronização de extratos bancários
 Converte extratos em formato bruto para o formato padronizado esperado pelo sistema
 """
 
+import importlib.util
 import pandas as pd
 import numpy as np
 from datetime import datetime
 from io import BytesIO
+from typing import Optional
 import re
 
+# Leitor calamine (Rust) quando disponível: bem mais rápido que o openpyxl para
+# planilhas grandes. Exige python-calamine e pandas >= 2.2.
+_PANDAS_VERSAO = tuple(int(p) for p in pd.__version__.split('.')[:2])
+EXCEL_ENGINE: Optional[str] = (
+    'calamine'
+    if importlib.util.find_spec('python_calamine') is not None and _PANDAS_VERSAO >= (2, 2)
+    else None
+)
+
 
 def is_transaction_line(valor):
     """
@@ -155,10 +166,7 @@ def standardize_bank_extract(file_content, file_name="extrato.xlsx"):
     """
     
     # Lê o arquivo Excel
-    if isinstance(file_content, str):
-        df = pd.read_excel(file_content, header=None)
-    else:
-        df = pd.read_excel(file_content, header=None)
+    df = pd.read_excel(file_content, header=None, engine=EXCEL_ENGINE)
     
     # Encontra o cabeçalho
     header_row = None
@@ -182,41 +190,62 @@ def standardize_bank_extract(file_content, file_name="extrato.xlsx"):
     last_date = None
     
     start_row = header_row + 1
-    n_rows = len(df)
     
-    # Identifica todas as linhas de transação
-    transaction_rows = []
-    for idx in range(start_row, n_rows):
-        valor = df.iloc[idx, col_valor]
-        if is_transaction_line(valor):
-            historico = df.iloc[idx, col_hist]
-            if not is_saldo_line(historico):
-                transaction_rows.append(idx)
+    # Coluna de valores como texto, sem espaços non-breaking (operações vetorizadas)
+    valores = df.iloc[start_row:, col_valor]
+    valores_str = (
+        valores.where(valores.notna(), '')
+        .astype(str)
+        .str.replace('\xa0', ' ', regex=False)
+        .str.strip()
+    )
+    ultimo_char = valores_str.str[-1].str.upper()
+    
+    # Identifica todas as linhas de transação (terminam com C ou D e não são saldo)
+    eh_transacao = ultimo_char.isin(['C', 'D']).to_numpy()
+    historicos = df.iloc[start_row:, col_hist]
+    hist_upper = historicos.where(historicos.notna(), '').astype(str).str.upper()
+    # Mesma regra de is_saldo_line: mantém SALDO ANTERIOR, ignora outros saldos e linhas especiais
+    saldo_anterior = (
+        hist_upper.str.contains('SALDO ANTERIOR', regex=False)
+        & ~hist_upper.str.contains('BLOQUEADO', regex=False)
+    )
+    palavras_saldo = hist_upper.str.contains('ABERTURA|ENCERRAMENTO|SALDO DO DIA|SALDO BLOQUEADO', regex=True)
+    eh_saldo = (historicos.notna() & ~saldo_anterior & palavras_saldo).to_numpy()
+    mascara = eh_transacao & ~eh_saldo
+    
+    # Valores: remove C/D, separador de milhar e troca vírgula por ponto; D = negativo
+    corpo = (
+        valores_str[mascara].str[:-1]
+        .str.strip()
+        .str.replace('.', '', regex=False)
+        .str.replace(',', '.', regex=False)
+        .str.replace(' ', '', regex=False)
+    )
+    valores_float = pd.to_numeric(corpo, errors='coerce').fillna(0.0).abs().to_numpy()
+    valores_float = np.where(ultimo_char[mascara].to_numpy() == 'D', -valores_float, valores_float)
+    
+    linhas = df.iloc[start_row:][mascara]
     
     # Processa cada transação
-    for row_idx in transaction_rows:
+    for data_val, documento, historico, valor_float in zip(
+        linhas[col_data], linhas[col_doc], linhas[col_hist], valores_float.tolist()
+    ):
         # Data
-        data_val = df.iloc[row_idx, col_data]
         data = parse_date_smart(data_val, last_date)
         if data:
             last_date = data
         
         # Documento
-        documento = df.iloc[row_idx, col_doc]
         doc_str = str(documento).strip() if pd.notna(documento) else ""
         
         # Histórico - APENAS da linha principal
-        historico = df.iloc[row_idx, col_hist]
         hist_str = extract_main_historico(historico)
         
         # Verifica se é linha de saldo (double check)
         if is_saldo_line(hist_str):
             continue
         
-        # Valor
-        valor = df.iloc[row_idx, col_valor]
-        valor_float = parse_valor_cd(valor)
-        
         # Adiciona apenas se valor != 0
         if valor_float != 0.0:
             transactions.append({
@@ -241,26 +270,24 @@ def standardize_bank_extract(file_content, file_name="extrato.xlsx"):
     # Cria arquivo Excel em memória
     output = BytesIO()
     
-    with pd.ExcelWriter(output, engine='openpyxl') as writer:
+    # xlsxwriter com formato por coluna: sem percorrer as células uma a uma.
+    # Datas recebem o formato via datetime_format (o pandas grava as datas com
+    # formato próprio de célula, que teria precedência sobre o da coluna).
+    with pd.ExcelWriter(
+        output, engine='xlsxwriter', datetime_format='DD/MM/YYYY', date_format='DD/MM/YYYY'
+    ) as writer:
         df_padrao.to_excel(writer, sheet_name='Sheet 1', index=False)
         
         # Formata a planilha
+        workbook = writer.book
         worksheet = writer.sheets['Sheet 1']
+        fmt_valor = workbook.add_format({'num_format': '#,##0.00'})
         
-        # Define largura das colunas
-        worksheet.column_dimensions['A'].width = 12  # DATA
-        worksheet.column_dimensions['B'].width = 18  # DOCUMENTO
-        worksheet.column_dimensions['C'].width = 60  # HISTÓRICO
-        worksheet.column_dimensions['D'].width = 14  # VALOR
-        
-        # Aplica formato de data e número
-        from openpyxl.styles import numbers
-        
-        for row in range(2, len(df_padrao) + 2):
-            # Data
-            worksheet[f'A{row}'].number_format = 'DD/MM/YYYY'
-            # Valor
-            worksheet[f'D{row}'].number_format = '#,##0.00'
+        # Define largura das colunas (e formato de número do VALOR)
+        worksheet.set_column('A:A', 12)  # DATA
+        worksheet.set_column('B:B', 18)  # DOCUMENTO
+        worksheet.set_column('C:C', 60)  # HISTÓRICO
+        worksheet.set_column('D:D', 14, fmt_valor)  # VALOR
     
     output.seek(0)
     return output
@@ -274,7 +301,7 @@ def detect_if_needs_standardization(file_content):
         bool: True se precisa padronizar, False se já está correto
     """
     try:
-        df = pd.read_excel(file_content, header=None)
+        df = pd.read_excel(file_content, header=None, nrows=2, engine=EXCEL_ENGINE)
         
         # Verifica se a primeira linha tem o cabeçalho esperado
         first_row = df.iloc[0].tolist()
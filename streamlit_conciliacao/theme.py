@@ -5,6 +5,7 @@ Módulo de configuração de tema e estilos para Neto Contabilidade.
 
 from pathlib import Path
 import base64
+import functools
 
 # =============================================================================
 # CONSTANTES DE CORES - IDENTIDADE VISUAL NETO CONTABILIDADE
@@ -28,33 +29,8 @@ CORES = {
 }
 
 
-# =============================================================================
-# FUNÇÕES DE ESTILO
-# =============================================================================
-
-def get_logo_base64() -> str:
-    """Retorna a logo em base64 para uso no HTML."""
-    logo_path = Path(__file__).parent / "assets" / "logo.png"
-    if logo_path.exists():
-        with open(logo_path, "rb") as f:
-            return base64.b64encode(f.read()).decode()
-    return ""
-
-
-def get_custom_css() -> str:
-    """Retorna o CSS customizado."""
-    css_path = Path(__file__).parent / "assets" / "styles.css"
-    if css_path.exists():
-        with open(css_path, "r", encoding="utf-8") as f:
-            return f.read()
-    return ""
-
-
-def aplicar_tema(st) -> None:
-    """Aplica o tema personalizado da Neto Contabilidade."""
-    
-    # CSS customizado inline para garantir aplicação
-    custom_css = f"""
+# CSS customizado inline para garantir aplicação, montado uma vez na importação
+_CUSTOM_CSS = f"""
     <style>
         /* Importar fonte profissional */
         @import url('https://fonts.googleapis.com/css2?family=Inter:wght@300;400;500;600;700&display=swap');
@@ -302,8 +278,35 @@ def aplicar_tema(st) -> None:
         }}
     </style>
     """
-    
-    st.markdown(custom_css, unsafe_allow_html=True)
+
+
+# =============================================================================
+# FUNÇÕES DE ESTILO
+# =============================================================================
+
+@functools.lru_cache(maxsize=1)
+def get_logo_base64() -> str:
+    """Retorna a logo em base64 para uso no HTML."""
+    logo_path = Path(__file__).parent / "assets" / "logo.png"
+    if logo_path.exists():
+        with open(logo_path, "rb") as f:
+            return base64.b64encode(f.read()).decode()
+    return ""
+
+
+@functools.lru_cache(maxsize=1)
+def get_custom_css() -> str:
+    """Retorna o CSS customizado."""
+    css_path = Path(__file__).parent / "assets" / "styles.css"
+    if css_path.exists():
+        with open(css_path, "r", encoding="utf-8") as f:
+            return f.read()
+    return ""
+
+
+def aplicar_tema(st) -> None:
+    """Aplica o tema personalizado da Neto Contabilidade."""
+    st.markdown(_CUSTOM_CSS, unsafe_allow_html=True)
 
 
 def render_logo_sidebar(st) -> None:
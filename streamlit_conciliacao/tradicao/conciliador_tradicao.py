@@ -9,6 +9,7 @@ from __future__ import annotations
 import pandas as pd
 from typing import Any, Dict, List, Optional, Tuple
 from datetime import datetime
+import functools
 import re
 
 from .utils_tradicao import (
@@ -27,21 +28,31 @@ CONTA_SICOOB = 543
 CONTA_BB = 495
 CONTA_CAIXA = 5
 
+_RE_PONTUACAO = re.compile(r'[^\w\s]')
+_RE_ESPACOS = re.compile(r'\s+')
+
 
 # ==========================================================================
 # FUNÇÕES AUXILIARES
 # ==========================================================================
 
-def _normalizar(texto: str) -> str:
-    """Normaliza texto para comparação."""
-    if pd.isna(texto):
-        return ""
-    texto = str(texto).upper().strip()
-    texto = re.sub(r'[^\w\s]', ' ', texto)
-    texto = re.sub(r'\s+', ' ', texto)
+@functools.lru_cache(maxsize=65536)
+def _normalizar_str(texto: str) -> str:
+    texto = texto.upper().strip()
+    texto = _RE_PONTUACAO.sub(' ', texto)
+    texto = _RE_ESPACOS.sub(' ', texto)
     return texto
 
 
+def _normalizar(texto: str) -> str:
+    """Normaliza texto para comparação (strings memoizadas: os mesmos históricos se repetem)."""
+    if not isinstance(texto, str):
+        if pd.isna(texto):
+            return ""
+        texto = str(texto)
+    return _normalizar_str(texto)
+
+
 def _criar_complemento(nf: Any, pagamento: str) -> str:
     """Cria complemento no formato 'NF PAGAMENTO'."""
     nf_str = ""
@@ -59,96 +70,109 @@ def _criar_complemento(nf: Any, pagamento: str) -> str:
     return ""
 
 
-def _buscar_conta_financeiro(pagamento: str, df_financeiro: pd.DataFrame) -> int:
-    """Busca conta contábil na aba FINANCEIRO pelo nome do pagamento."""
-    if df_financeiro.empty or not pagamento:
+def _coluna(df: pd.DataFrame, nome: str, padrao: Any) -> List[Any]:
+    """Valores de uma coluna como lista (padrão para cada linha se a coluna não existir)."""
+    if nome in df.columns:
+        return df[nome].tolist()
+    return [padrao] * len(df)
+
+
+def _preparar_busca_financeiro(df_financeiro: pd.DataFrame) -> List[Tuple[str, List[str], int]]:
+    """
+    Pré-processa a aba FINANCEIRO uma única vez por conciliação.
+    Retorna, na ordem da planilha, (nome_normalizado, palavras_4+, conta) apenas
+    das linhas com nome e conta válida - as demais nunca seriam retornadas.
+    """
+    busca: List[Tuple[str, List[str], int]] = []
+    for nome, conta in zip(_coluna(df_financeiro, 'CONTAS', ''), _coluna(df_financeiro, 'CONTA_CONTABIL', 0)):
+        conta_nome = _normalizar(nome)
+        if conta_nome and pd.notna(conta) and int(conta) > 0:
+            palavras = [p for p in conta_nome.split() if len(p) >= 4]
+            busca.append((conta_nome, palavras, int(conta)))
+    return busca
+
+
+def _preparar_busca_banco(df_banco: pd.DataFrame) -> List[Tuple[str, List[str], int, Optional[int]]]:
+    """
+    Pré-processa uma aba de banco uma única vez por conciliação.
+    Retorna (descricao_normalizada, palavras_4+, conta, cod_historico ou None).
+    
+    O DataFrame carregado por utils_tradicao tem colunas:
+    - HISTORICO (ou HISTORICO_NORM)
+    - CONTA_CONTABIL
+    - COD_HISTORICO
+    """
+    busca: List[Tuple[str, List[str], int, Optional[int]]] = []
+    linhas = zip(
+        _coluna(df_banco, 'HISTORICO', ''),
+        _coluna(df_banco, 'CONTA_CONTABIL', 0),
+        _coluna(df_banco, 'COD_HISTORICO', None),
+    )
+    for historico, conta, cod_hist in linhas:
+        desc = _normalizar(historico)
+        if desc and pd.notna(conta) and int(conta) > 0:
+            palavras = [p for p in desc.split() if len(p) >= 4]
+            cod = int(cod_hist) if cod_hist is not None and pd.notna(cod_hist) else None
+            busca.append((desc, palavras, int(conta), cod))
+    return busca
+
+
+def _buscar_conta_financeiro(pagamento: str, busca_financeiro: List[Tuple[str, List[str], int]]) -> int:
+    """Busca conta contábil na aba FINANCEIRO (pré-processada) pelo nome do pagamento."""
+    if not busca_financeiro or not pagamento:
         return 0
     
     pag_norm = _normalizar(pagamento)
     
     # Busca exata - nome da conta contido no pagamento
-    for _, row in df_financeiro.iterrows():
-        conta_nome = _normalizar(row.get('CONTAS', ''))
-        if conta_nome and conta_nome in pag_norm:
-            conta = row.get('CONTA_CONTABIL', 0)
-            if pd.notna(conta) and int(conta) > 0:
-                return int(conta)
+    for conta_nome, _, conta in busca_financeiro:
+        if conta_nome in pag_norm:
+            return conta
     
     # Busca reversa - pagamento contido no nome da conta
-    for _, row in df_financeiro.iterrows():
-        conta_nome = _normalizar(row.get('CONTAS', ''))
-        if conta_nome and pag_norm in conta_nome:
-            conta = row.get('CONTA_CONTABIL', 0)
-            if pd.notna(conta) and int(conta) > 0:
-                return int(conta)
+    for conta_nome, _, conta in busca_financeiro:
+        if pag_norm in conta_nome:
+            return conta
     
     # Busca parcial por palavras
-    for _, row in df_financeiro.iterrows():
-        conta_nome = _normalizar(row.get('CONTAS', ''))
-        if conta_nome:
-            palavras = conta_nome.split()
-            for palavra in palavras:
-                if len(palavra) >= 4 and palavra in pag_norm:
-                    conta = row.get('CONTA_CONTABIL', 0)
-                    if pd.notna(conta) and int(conta) > 0:
-                        return int(conta)
+    for _, palavras, conta in busca_financeiro:
+        for palavra in palavras:
+            if palavra in pag_norm:
+                return conta
     
     return 0
 
 
-def _buscar_conta_banco(historico: str, df_banco: pd.DataFrame, tipo: str = 'SAIDA') -> Tuple[int, int]:
+def _buscar_conta_banco(
+    historico: str,
+    busca_banco: List[Tuple[str, List[str], int, Optional[int]]],
+    tipo: str = 'SAIDA',
+) -> Tuple[int, int]:
     """
-    Busca conta contábil e código de histórico na aba do banco.
+    Busca conta contábil e código de histórico na aba do banco (pré-processada).
     Retorna (conta_contabil, cod_historico)
-    
-    O DataFrame carregado por utils_tradicao tem colunas:
-    - HISTORICO (ou HISTORICO_NORM)
-    - CONTA_CONTABIL
-    - COD_HISTORICO
     """
-    if df_banco.empty or not historico:
-        return 0, 34 if tipo == 'SAIDA' else 2  # padrão
-    
-    hist_norm = _normalizar(historico)
     default_cod = 34 if tipo == 'SAIDA' else 2
+    if not busca_banco or not historico:
+        return 0, default_cod  # padrão
     
-    # Colunas padronizadas pelo utils_tradicao
-    col_desc = 'HISTORICO'
-    col_conta = 'CONTA_CONTABIL'
-    col_hist = 'COD_HISTORICO'
+    hist_norm = _normalizar(historico)
     
     # Busca exata - descrição do banco contida no histórico do extrato
-    for _, row in df_banco.iterrows():
-        desc = _normalizar(row.get(col_desc, ''))
-        if desc and desc in hist_norm:
-            conta = row.get(col_conta, 0)
-            cod_hist = row.get(col_hist, default_cod)
-            if pd.notna(conta) and int(conta) > 0:
-                cod_hist = int(cod_hist) if pd.notna(cod_hist) else default_cod
-                return int(conta), cod_hist
+    for desc, _, conta, cod_hist in busca_banco:
+        if desc in hist_norm:
+            return conta, cod_hist if cod_hist is not None else default_cod
     
     # Busca reversa - histórico contido na descrição do banco
-    for _, row in df_banco.iterrows():
-        desc = _normalizar(row.get(col_desc, ''))
-        if desc and hist_norm in desc:
-            conta = row.get(col_conta, 0)
-            cod_hist = row.get(col_hist, default_cod)
-            if pd.notna(conta) and int(conta) > 0:
-                cod_hist = int(cod_hist) if pd.notna(cod_hist) else default_cod
-                return int(conta), cod_hist
+    for desc, _, conta, cod_hist in busca_banco:
+        if hist_norm in desc:
+            return conta, cod_hist if cod_hist is not None else default_cod
     
     # Busca parcial por palavras-chave (mínimo 4 caracteres)
-    for _, row in df_banco.iterrows():
-        desc = _normalizar(row.get(col_desc, ''))
-        if desc:
-            palavras = [p for p in desc.split() if len(p) >= 4]
-            for palavra in palavras:
-                if palavra in hist_norm:
-                    conta = row.get(col_conta, 0)
-                    cod_hist = row.get(col_hist, default_cod)
-                    if pd.notna(conta) and int(conta) > 0:
-                        cod_hist = int(cod_hist) if pd.notna(cod_hist) else default_cod
-                        return int(conta), cod_hist
+    for _, palavras, conta, cod_hist in busca_banco:
+        for palavra in palavras:
+            if palavra in hist_norm:
+                return conta, cod_hist if cod_hist is not None else default_cod
     
     return 0, default_cod
 
@@ -173,36 +197,50 @@ def _identificar_tipo_movimento(historico: str, credito: float, debito: float) -
     return 'OUTRO'
 
 
-def _encontrar_na_movimentacao(data_ext, valor_ext: float, df_mov: pd.DataFrame) -> Optional[pd.Series]:
-    """Encontra lançamento correspondente na planilha de movimentação."""
+def _data_de(valor) -> Any:
+    """Converte data (datetime ou texto dd/mm/aaaa) para date."""
+    if hasattr(valor, 'date'):
+        return valor.date()
+    return pd.to_datetime(valor, dayfirst=True).date()
+
+
+def _indexar_movimentacao(df_mov: pd.DataFrame) -> Dict[Any, List[Tuple[int, float]]]:
+    """
+    Agrupa a planilha de movimentação por data uma única vez por conciliação.
+    Retorna {data: [(posicao_linha, valor), ...]} preservando a ordem das linhas.
+    """
+    indice: Dict[Any, List[Tuple[int, float]]] = {}
+    linhas = zip(_coluna(df_mov, 'DATA', None), _coluna(df_mov, 'VALOR', 0))
+    for pos, (data_mov, valor_mov) in enumerate(linhas):
+        if pd.isna(data_mov):
+            continue
+        try:
+            data_mov_date = _data_de(data_mov)
+        except:
+            continue
+        indice.setdefault(data_mov_date, []).append((pos, float(valor_mov or 0)))
+    return indice
+
+
+def _encontrar_na_movimentacao(
+    data_ext,
+    valor_ext: float,
+    df_mov: pd.DataFrame,
+    indice_mov: Dict[Any, List[Tuple[int, float]]],
+) -> Optional[pd.Series]:
+    """Encontra lançamento correspondente na planilha de movimentação (indexada por data)."""
     if df_mov.empty:
         return None
     
     try:
-        if hasattr(data_ext, 'date'):
-            data_busca = data_ext.date()
-        else:
-            data_busca = pd.to_datetime(data_ext, dayfirst=True).date()
+        data_busca = _data_de(data_ext)
     except:
         return None
     
-    for idx, row in df_mov.iterrows():
-        data_mov = row.get('DATA')
-        if pd.isna(data_mov):
-            continue
-        
-        try:
-            if hasattr(data_mov, 'date'):
-                data_mov_date = data_mov.date()
-            else:
-                data_mov_date = pd.to_datetime(data_mov, dayfirst=True).date()
-        except:
-            continue
-        
-        valor_mov = float(row.get('VALOR', 0) or 0)
-        
-        if data_mov_date == data_busca and abs(valor_mov - valor_ext) < 0.02:
-            return row
+    # Só as linhas da mesma data; a primeira com valor dentro da tolerância
+    for pos, valor_mov in indice_mov.get(data_busca, ()):
+        if abs(valor_mov - valor_ext) < 0.02:
+            return df_mov.iloc[pos]
     
     return None
 
@@ -224,16 +262,18 @@ def conciliar_tradicao(
     resultado: List[dict] = []
     nao_encontrados: List[dict] = []
     
-    # Obter DataFrames de contas
-    df_financeiro = contas.get('financeiro', pd.DataFrame())
-    df_sicoob_saidas = contas.get('sicoob_saidas', pd.DataFrame())
-    df_sicoob_entradas = contas.get('sicoob_entradas', pd.DataFrame())
-    df_bb_saidas = contas.get('bb_saidas', pd.DataFrame())
-    df_bb_entradas = contas.get('bb_entradas', pd.DataFrame())
+    # Obter contas, pré-processadas uma vez para as buscas por transação
+    busca_financeiro = _preparar_busca_financeiro(contas.get('financeiro', pd.DataFrame()))
+    busca_sicoob_saidas = _preparar_busca_banco(contas.get('sicoob_saidas', pd.DataFrame()))
+    busca_sicoob_entradas = _preparar_busca_banco(contas.get('sicoob_entradas', pd.DataFrame()))
+    busca_bb_saidas = _preparar_busca_banco(contas.get('bb_saidas', pd.DataFrame()))
+    busca_bb_entradas = _preparar_busca_banco(contas.get('bb_entradas', pd.DataFrame()))
     
     # Obter movimentação
     df_mov_sicoob = movimentacao.get('pag_sicoob', pd.DataFrame())
     df_mov_bb = movimentacao.get('pag_bb', pd.DataFrame())
+    indice_mov_sicoob = _indexar_movimentacao(df_mov_sicoob)
+    indice_mov_bb = _indexar_movimentacao(df_mov_bb)
     
     # ==========================================================================
     # 1) PROCESSAR EXTRATO SICOOB
@@ -264,11 +304,11 @@ def conciliar_tradicao(
             # TARIFAS/TAXAS - Saída do banco
             # ------------------------------------------------------------------
             if tipo == 'TARIFA':
-                conta, cod_hist = _buscar_conta_banco(historico, df_sicoob_saidas, 'SAIDA')
+                conta, cod_hist = _buscar_conta_banco(historico, busca_sicoob_saidas, 'SAIDA')
                 
                 if conta == 0:
                     # Tentar buscar no financeiro
-                    conta = _buscar_conta_financeiro(historico, df_financeiro)
+                    conta = _buscar_conta_financeiro(historico, busca_financeiro)
                     cod_hist = 11  # Padrão para tarifas
                 
                 if conta == 0:
@@ -296,11 +336,11 @@ def conciliar_tradicao(
             # ENTRADAS - Crédito no banco, Débito na conta origem
             # ------------------------------------------------------------------
             elif tipo == 'ENTRADA':
-                conta, cod_hist = _buscar_conta_banco(historico, df_sicoob_entradas, 'ENTRADA')
+                conta, cod_hist = _buscar_conta_banco(historico, busca_sicoob_entradas, 'ENTRADA')
                 
                 if conta == 0:
                     # Tentar buscar no financeiro
-                    conta = _buscar_conta_financeiro(historico, df_financeiro)
+                    conta = _buscar_conta_financeiro(historico, busca_financeiro)
                     cod_hist = 2  # Recebimento
                 
                 if conta == 0:
@@ -330,18 +370,18 @@ def conciliar_tradicao(
             # ------------------------------------------------------------------
             elif tipo == 'SAIDA':
                 # Buscar na movimentação para pegar nome do fornecedor e NF
-                match = _encontrar_na_movimentacao(data, valor, df_mov_sicoob)
+                match = _encontrar_na_movimentacao(data, valor, df_mov_sicoob, indice_mov_sicoob)
                 
                 if match is not None:
                     pagamento = match.get('PAGAMENTO', '')
                     nf = match.get('NF', '')
                     
                     # Buscar conta no financeiro pelo nome do pagamento
-                    conta = _buscar_conta_financeiro(pagamento, df_financeiro)
+                    conta = _buscar_conta_financeiro(pagamento, busca_financeiro)
                     
                     if conta == 0:
                         # Tentar buscar no banco
-                        conta, _ = _buscar_conta_banco(historico, df_sicoob_saidas, 'SAIDA')
+                        conta, _ = _buscar_conta_banco(historico, busca_sicoob_saidas, 'SAIDA')
                     
                     if conta == 0:
                         nao_encontrados.append({
@@ -360,10 +400,10 @@ def conciliar_tradicao(
                     
                 else:
                     # Não encontrou na movimentação, buscar no banco
-                    conta, cod_hist = _buscar_conta_banco(historico, df_sicoob_saidas, 'SAIDA')
+                    conta, cod_hist = _buscar_conta_banco(historico, busca_sicoob_saidas, 'SAIDA')
                     
                     if conta == 0:
-                        conta = _buscar_conta_financeiro(historico, df_financeiro)
+                        conta = _buscar_conta_financeiro(historico, busca_financeiro)
                         cod_hist = 34
                     
                     if conta == 0:
@@ -418,10 +458,10 @@ def conciliar_tradicao(
             # TARIFAS/TAXAS
             # ------------------------------------------------------------------
             if tipo == 'TARIFA':
-                conta, cod_hist = _buscar_conta_banco(historico, df_bb_saidas, 'SAIDA')
+                conta, cod_hist = _buscar_conta_banco(historico, busca_bb_saidas, 'SAIDA')
                 
                 if conta == 0:
-                    conta = _buscar_conta_financeiro(historico, df_financeiro)
+                    conta = _buscar_conta_financeiro(historico, busca_financeiro)
                     cod_hist = 11
                 
                 if conta == 0:
@@ -449,10 +489,10 @@ def conciliar_tradicao(
             # ENTRADAS
             # ------------------------------------------------------------------
             elif tipo == 'ENTRADA':
-                conta, cod_hist = _buscar_conta_banco(historico, df_bb_entradas, 'ENTRADA')
+                conta, cod_hist = _buscar_conta_banco(historico, busca_bb_entradas, 'ENTRADA')
                 
                 if conta == 0:
-                    conta = _buscar_conta_financeiro(historico, df_financeiro)
+                    conta = _buscar_conta_financeiro(historico, busca_financeiro)
                     cod_hist = 2
                 
                 if conta == 0:
@@ -480,16 +520,16 @@ def conciliar_tradicao(
             # SAÍDAS
             # ------------------------------------------------------------------
             elif tipo == 'SAIDA':
-                match = _encontrar_na_movimentacao(data, valor, df_mov_bb)
+                match = _encontrar_na_movimentacao(data, valor, df_mov_bb, indice_mov_bb)
                 
                 if match is not None:
                     pagamento = match.get('PAGAMENTO', '')
                     nf = match.get('NF', '')
                     
-                    conta = _buscar_conta_financeiro(pagamento, df_financeiro)
+                    conta = _buscar_conta_financeiro(pagamento, busca_financeiro)
                     
                     if conta == 0:
-                        conta, _ = _buscar_conta_banco(historico, df_bb_saidas, 'SAIDA')
+                        conta, _ = _buscar_conta_banco(historico, busca_bb_saidas, 'SAIDA')
                     
                     if conta == 0:
                         nao_encontrados.append({
@@ -507,10 +547,10 @@ def conciliar_tradicao(
                     cod_hist = 34
                     
                 else:
-                    conta, cod_hist = _buscar_conta_banco(historico, df_bb_saidas, 'SAIDA')
+                    conta, cod_hist = _buscar_conta_banco(historico, busca_bb_saidas, 'SAIDA')
                     
                     if conta == 0:
-                        conta = _buscar_conta_financeiro(historico, df_financeiro)
+                        conta = _buscar_conta_financeiro(historico, busca_financeiro)
                         cod_hist = 34
                     
                     if conta == 0:
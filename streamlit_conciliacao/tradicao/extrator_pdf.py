@@ -6,6 +6,7 @@ Versão simplificada para integração com Streamlit.
 
 from __future__ import annotations
 
+import importlib.util
 import re
 from pathlib import Path
 from datetime import datetime
@@ -14,24 +15,24 @@ import io
 
 import pandas as pd
 
-try:
-    import pdfplumber
-    PDF_AVAILABLE = True
-except ImportError:
-    PDF_AVAILABLE = False
+# pdfplumber (pdfminer) e PyMuPDF custam ~0,1s para importar; checa só a
+# presença aqui e importa dentro das funções que realmente leem o PDF.
+PDF_AVAILABLE = importlib.util.find_spec('pdfplumber') is not None
+FITZ_AVAILABLE = importlib.util.find_spec('pymupdf') is not None
 
 
 class ExtratorBB:
     """Extrator de extratos do Banco do Brasil em PDF."""
     
     def __init__(self):
-        if not PDF_AVAILABLE:
-            raise ImportError("pdfplumber não está instalado. Execute: pip install pdfplumber")
         self.movimentacoes = []
         self.info_conta = {}
     
     def extrair_texto(self, pdf_file: Any) -> str:
         """Extrai texto do PDF."""
+        if not PDF_AVAILABLE:
+            raise ImportError("pdfplumber não está instalado. Execute: pip install pdfplumber")
+        import pdfplumber
         texto = ""
         with pdfplumber.open(pdf_file) as pdf:
             for page in pdf.pages:
@@ -110,7 +111,10 @@ class ExtratorBB:
     
     def processar_pdf(self, pdf_file: Any) -> pd.DataFrame:
         """Processa PDF e retorna DataFrame formatado."""
-        texto = self.extrair_texto(pdf_file)
+        return self.processar_texto(self.extrair_texto(pdf_file))
+    
+    def processar_texto(self, texto: str) -> pd.DataFrame:
+        """Processa o texto já extraído do PDF e retorna DataFrame formatado."""
         inicio, fim = self.extrair_periodo(texto)
         
         if fim is None:
@@ -130,13 +134,14 @@ class ExtratorSicoob:
     """Extrator de extratos do SICOOB em PDF."""
     
     def __init__(self):
-        if not PDF_AVAILABLE:
-            raise ImportError("pdfplumber não está instalado. Execute: pip install pdfplumber")
         self.movimentacoes = []
         self.info_conta = {}
     
     def extrair_texto(self, pdf_file: Any) -> str:
         """Extrai texto do PDF."""
+        if not PDF_AVAILABLE:
+            raise ImportError("pdfplumber não está instalado. Execute: pip install pdfplumber")
+        import pdfplumber
         texto = ""
         with pdfplumber.open(pdf_file) as pdf:
             for page in pdf.pages:
@@ -222,7 +227,10 @@ class ExtratorSicoob:
     
     def processar_pdf(self, pdf_file: Any) -> pd.DataFrame:
         """Processa PDF e retorna DataFrame formatado."""
-        texto = self.extrair_texto(pdf_file)
+        return self.processar_texto(self.extrair_texto(pdf_file))
+    
+    def processar_texto(self, texto: str) -> pd.DataFrame:
+        """Processa o texto já extraído do PDF e retorna DataFrame formatado."""
         lancamentos = self.extrair_lancamentos(texto)
         
         if not lancamentos:
@@ -233,6 +241,21 @@ class ExtratorSicoob:
         return df
 
 
+def _resolver_banco(pdf_file: Any, banco: str) -> str:
+    """Resolve banco='auto' pelo nome do arquivo (SICOOB por padrão)."""
+    if banco != 'auto':
+        return banco
+    nome_arquivo = getattr(pdf_file, 'name', str(pdf_file)).upper()
+    if 'BB' in nome_arquivo or 'BRASIL' in nome_arquivo:
+        return 'BB'
+    # SICOOB explícito ou default
+    return 'SICOOB'
+
+
+def _criar_extrator(banco: str):
+    return ExtratorBB() if banco == 'BB' else ExtratorSicoob()
+
+
 def processar_pdf_extrato(pdf_file: Any, banco: str = 'auto') -> pd.DataFrame:
     """
     Função utilitária para processar PDF de extrato.
@@ -247,20 +270,38 @@ def processar_pdf_extrato(pdf_file: Any, banco: str = 'auto') -> pd.DataFrame:
     if not PDF_AVAILABLE:
         raise ImportError("pdfplumber não está instalado. Execute: pip install pdfplumber")
     
-    # Detecção automática
-    if banco == 'auto':
-        nome_arquivo = getattr(pdf_file, 'name', str(pdf_file)).upper()
-        if 'BB' in nome_arquivo or 'BRASIL' in nome_arquivo:
-            banco = 'BB'
-        elif 'SICOOB' in nome_arquivo:
-            banco = 'SICOOB'
-        else:
-            # Tentar detectar pelo conteúdo
-            banco = 'SICOOB'  # Default
+    extrator = _criar_extrator(_resolver_banco(pdf_file, banco))
+    return extrator.processar_pdf(pdf_file)
+
+
+def extrair_texto_fitz(pdf_file: Any) -> str:
+    """Extrai texto do PDF com PyMuPDF (núcleo em C, bem mais rápido que o pdfminer)."""
+    import pymupdf
     
-    if banco == 'BB':
-        extrator = ExtratorBB()
+    if hasattr(pdf_file, 'read'):
+        pdf_file.seek(0)
+        doc = pymupdf.open(stream=pdf_file.read(), filetype='pdf')
     else:
-        extrator = ExtratorSicoob()
+        doc = pymupdf.open(pdf_file)
     
-    return extrator.processar_pdf(pdf_file)
+    texto = ""
+    with doc:
+        for page in doc:
+            # sort=True ordena os blocos por posição (topo→base, esquerda→direita)
+            t = page.get_text('text', sort=True)
+            if t:
+                texto += t + "\n"
+    return texto
+
+
+def processar_pdf_extrato_fitz(pdf_file: Any, banco: str = 'auto') -> pd.DataFrame:
+    """
+    Igual a processar_pdf_extrato, mas extraindo o texto com PyMuPDF.
+    
+    O parsing das linhas é o mesmo dos extratores pdfplumber.
+    """
+    if not FITZ_AVAILABLE:
+        raise ImportError("PyMuPDF não está instalado. Execute: pip install pymupdf")
+    
+    extrator = _criar_extrator(_resolver_banco(pdf_file, banco))
+    return extrator.processar_texto(extrair_texto_fitz(pdf_file))
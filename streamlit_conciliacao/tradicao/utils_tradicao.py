@@ -3,12 +3,29 @@
 
 from __future__ import annotations
 
+import importlib.util
 import re
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
 
 import pandas as pd
 
+# Leitor calamine (Rust) quando disponível: bem mais rápido que o openpyxl para
+# planilhas grandes. Exige python-calamine e pandas >= 2.2.
+_PANDAS_VERSAO = tuple(int(p) for p in pd.__version__.split('.')[:2])
+EXCEL_ENGINE: Optional[str] = (
+    'calamine'
+    if importlib.util.find_spec('python_calamine') is not None and _PANDAS_VERSAO >= (2, 2)
+    else None
+)
+
+
+def ler_excel(arquivo: Any, **kwargs: Any) -> pd.DataFrame:
+    """pd.read_excel usando o engine mais rápido instalado."""
+    if hasattr(arquivo, 'seek'):
+        arquivo.seek(0)
+    return pd.read_excel(arquivo, engine=EXCEL_ENGINE, **kwargs)
+
 
 def normalizar_texto(texto: str) -> str:
     """Normaliza texto para comparação (maiúsculas, sem acentos extras, sem espaços extras)."""
@@ -20,6 +37,17 @@ def normalizar_texto(texto: str) -> str:
     return texto
 
 
+def normalizar_serie(serie: pd.Series) -> pd.Series:
+    """Versão vetorizada de normalizar_texto, aplicada à coluna inteira de uma vez."""
+    return (
+        serie.where(serie.notna(), '')
+        .astype(str)
+        .str.upper()
+        .str.strip()
+        .str.replace(r'\s+', ' ', regex=True)
+    )
+
+
 def carregar_contas_contabeis(arquivo: Any) -> Dict[str, pd.DataFrame]:
     """
     Carrega a planilha de contas contábeis com as três abas.
@@ -35,16 +63,16 @@ def carregar_contas_contabeis(arquivo: Any) -> Dict[str, pd.DataFrame]:
     
     # Carregar aba FINANCEIRO
     # Estrutura original: CONTAS | CONTA CONTABIL
-    df_fin = pd.read_excel(arquivo, sheet_name='FINANCEIRO')
+    df_fin = ler_excel(arquivo, sheet_name='FINANCEIRO')
     df_fin.columns = ['CONTAS', 'CONTA_CONTABIL']  # Manter ordem correta!
-    df_fin['CONTAS_NORM'] = df_fin['CONTAS'].apply(normalizar_texto)
+    df_fin['CONTAS_NORM'] = normalizar_serie(df_fin['CONTAS'])
     df_fin['CONTA_CONTABIL'] = pd.to_numeric(df_fin['CONTA_CONTABIL'], errors='coerce').fillna(0).astype(int)
     contas['financeiro'] = df_fin
     
     # Carregar aba BANCO DO BRASIL
     # Estrutura: SAIDAS | CONTA CONTABIL | COD Historico | ENTRADAS | CONTA CONTABIL.1 | CONTA CONTABIL2
     # Onde CONTA CONTABIL2 é o COD Historico para entradas
-    df_bb = pd.read_excel(arquivo, sheet_name='BANCO DO BRASIL')
+    df_bb = ler_excel(arquivo, sheet_name='BANCO DO BRASIL')
     
     # Separar saídas - incluindo COD Historico
     try:
@@ -55,7 +83,7 @@ def carregar_contas_contabeis(arquivo: Any) -> Dict[str, pd.DataFrame]:
         df_bb_saidas.columns = ['HISTORICO', 'CONTA_CONTABIL']
         df_bb_saidas['COD_HISTORICO'] = 34  # Default para saídas
     df_bb_saidas = df_bb_saidas.dropna(subset=['HISTORICO'])
-    df_bb_saidas['HISTORICO_NORM'] = df_bb_saidas['HISTORICO'].apply(normalizar_texto)
+    df_bb_saidas['HISTORICO_NORM'] = normalizar_serie(df_bb_saidas['HISTORICO'])
     df_bb_saidas['CONTA_CONTABIL'] = pd.to_numeric(df_bb_saidas['CONTA_CONTABIL'], errors='coerce').fillna(0).astype(int)
     df_bb_saidas['COD_HISTORICO'] = pd.to_numeric(df_bb_saidas['COD_HISTORICO'], errors='coerce').fillna(34).astype(int)
     contas['bb_saidas'] = df_bb_saidas
@@ -72,14 +100,14 @@ def carregar_contas_contabeis(arquivo: Any) -> Dict[str, pd.DataFrame]:
         except:
             df_bb_entradas = pd.DataFrame(columns=['HISTORICO', 'CONTA_CONTABIL', 'COD_HISTORICO'])
     df_bb_entradas = df_bb_entradas.dropna(subset=['HISTORICO'])
-    df_bb_entradas['HISTORICO_NORM'] = df_bb_entradas['HISTORICO'].apply(normalizar_texto)
+    df_bb_entradas['HISTORICO_NORM'] = normalizar_serie(df_bb_entradas['HISTORICO'])
     df_bb_entradas['CONTA_CONTABIL'] = pd.to_numeric(df_bb_entradas['CONTA_CONTABIL'], errors='coerce').fillna(0).astype(int)
     df_bb_entradas['COD_HISTORICO'] = pd.to_numeric(df_bb_entradas['COD_HISTORICO'], errors='coerce').fillna(2).astype(int)
     contas['bb_entradas'] = df_bb_entradas
     
     # Carregar aba SICOOB
     # Estrutura: SAIDAS | CONTA CONTABIL | COD Historico | ENTRADAS | CONTA CONTABIL.1 | CONTA CONTABIL2
-    df_sicoob = pd.read_excel(arquivo, sheet_name='SICOOB')
+    df_sicoob = ler_excel(arquivo, sheet_name='SICOOB')
     
     # Separar saídas - incluindo COD Historico
     try:
@@ -90,7 +118,7 @@ def carregar_contas_contabeis(arquivo: Any) -> Dict[str, pd.DataFrame]:
         df_sicoob_saidas.columns = ['HISTORICO', 'CONTA_CONTABIL']
         df_sicoob_saidas['COD_HISTORICO'] = 34  # Default para saídas
     df_sicoob_saidas = df_sicoob_saidas.dropna(subset=['HISTORICO'])
-    df_sicoob_saidas['HISTORICO_NORM'] = df_sicoob_saidas['HISTORICO'].apply(normalizar_texto)
+    df_sicoob_saidas['HISTORICO_NORM'] = normalizar_serie(df_sicoob_saidas['HISTORICO'])
     df_sicoob_saidas['CONTA_CONTABIL'] = pd.to_numeric(df_sicoob_saidas['CONTA_CONTABIL'], errors='coerce').fillna(0).astype(int)
     df_sicoob_saidas['COD_HISTORICO'] = pd.to_numeric(df_sicoob_saidas['COD_HISTORICO'], errors='coerce').fillna(34).astype(int)
     contas['sicoob_saidas'] = df_sicoob_saidas
@@ -107,7 +135,7 @@ def carregar_contas_contabeis(arquivo: Any) -> Dict[str, pd.DataFrame]:
         except:
             df_sicoob_entradas = pd.DataFrame(columns=['HISTORICO', 'CONTA_CONTABIL', 'COD_HISTORICO'])
     df_sicoob_entradas = df_sicoob_entradas.dropna(subset=['HISTORICO'])
-    df_sicoob_entradas['HISTORICO_NORM'] = df_sicoob_entradas['HISTORICO'].apply(normalizar_texto)
+    df_sicoob_entradas['HISTORICO_NORM'] = normalizar_serie(df_sicoob_entradas['HISTORICO'])
     df_sicoob_entradas['CONTA_CONTABIL'] = pd.to_numeric(df_sicoob_entradas['CONTA_CONTABIL'], errors='coerce').fillna(0).astype(int)
     df_sicoob_entradas['COD_HISTORICO'] = pd.to_numeric(df_sicoob_entradas['COD_HISTORICO'], errors='coerce').fillna(2).astype(int)
     contas['sicoob_entradas'] = df_sicoob_entradas
@@ -125,7 +153,7 @@ def carregar_planilha_movimentacao(arquivo: Any) -> Dict[str, pd.DataFrame]:
     
     # Carregar PAG SICOOB
     try:
-        df_sicoob = pd.read_excel(arquivo, sheet_name='PAG SICOOB')
+        df_sicoob = ler_excel(arquivo, sheet_name='PAG SICOOB')
         # Selecionar apenas colunas relevantes
         colunas_relevantes = ['DATA', 'PAGAMENTO', 'VALOR', 'NF', 'DATA NF', 'OBS']
         df_sicoob = df_sicoob[[c for c in colunas_relevantes if c in df_sicoob.columns]]
@@ -133,7 +161,7 @@ def carregar_planilha_movimentacao(arquivo: Any) -> Dict[str, pd.DataFrame]:
         df_sicoob = df_sicoob[df_sicoob['DATA'].notna() & df_sicoob['VALOR'].notna()]
         df_sicoob['DATA'] = pd.to_datetime(df_sicoob['DATA'], errors='coerce')
         df_sicoob['VALOR'] = pd.to_numeric(df_sicoob['VALOR'], errors='coerce').abs()
-        df_sicoob['PAGAMENTO_NORM'] = df_sicoob['PAGAMENTO'].apply(normalizar_texto)
+        df_sicoob['PAGAMENTO_NORM'] = normalizar_serie(df_sicoob['PAGAMENTO'])
         df_sicoob['BANCO'] = 'SICOOB'
         movimentacao['pag_sicoob'] = df_sicoob
     except Exception as e:
@@ -142,14 +170,14 @@ def carregar_planilha_movimentacao(arquivo: Any) -> Dict[str, pd.DataFrame]:
     
     # Carregar PAG BB
     try:
-        df_bb = pd.read_excel(arquivo, sheet_name='PAG BB')
+        df_bb = ler_excel(arquivo, sheet_name='PAG BB')
         colunas_relevantes = ['DATA', 'PAGAMENTO', 'VALOR', 'NF', 'DATA NF', 'OBS']
         df_bb = df_bb[[c for c in colunas_relevantes if c in df_bb.columns]]
         df_bb = df_bb.dropna(subset=['DATA', 'PAGAMENTO', 'VALOR'], how='all')
         df_bb = df_bb[df_bb['DATA'].notna() & df_bb['VALOR'].notna()]
         df_bb['DATA'] = pd.to_datetime(df_bb['DATA'], errors='coerce')
         df_bb['VALOR'] = pd.to_numeric(df_bb['VALOR'], errors='coerce').abs()
-        df_bb['PAGAMENTO_NORM'] = df_bb['PAGAMENTO'].apply(normalizar_texto)
+        df_bb['PAGAMENTO_NORM'] = normalizar_serie(df_bb['PAGAMENTO'])
         df_bb['BANCO'] = 'BB'
         movimentacao['pag_bb'] = df_bb
     except Exception as e:
@@ -158,7 +186,7 @@ def carregar_planilha_movimentacao(arquivo: Any) -> Dict[str, pd.DataFrame]:
     
     # Carregar CAIXA EMPRESA (tem duas seções: saídas e entradas)
     try:
-        df_caixa = pd.read_excel(arquivo, sheet_name='CAIXA EMPRESA')
+        df_caixa = ler_excel(arquivo, sheet_name='CAIXA EMPRESA')
         
         # Saídas do caixa (colunas A-E)
         df_saidas = df_caixa[['DATA PG', 'PAGAMENTO', 'VALOR', 'NF', 'DATA NF']].copy()
@@ -166,7 +194,7 @@ def carregar_planilha_movimentacao(arquivo: Any) -> Dict[str, pd.DataFrame]:
         df_saidas = df_saidas[df_saidas['DATA'].notna() & df_saidas['VALOR'].notna()]
         df_saidas['DATA'] = pd.to_datetime(df_saidas['DATA'], errors='coerce')
         df_saidas['VALOR'] = pd.to_numeric(df_saidas['VALOR'], errors='coerce').abs()
-        df_saidas['PAGAMENTO_NORM'] = df_saidas['PAGAMENTO'].apply(normalizar_texto)
+        df_saidas['PAGAMENTO_NORM'] = normalizar_serie(df_saidas['PAGAMENTO'])
         df_saidas['TIPO'] = 'SAIDA'
         
         # Entradas do caixa (colunas H-M)
@@ -177,7 +205,7 @@ def carregar_planilha_movimentacao(arquivo: Any) -> Dict[str, pd.DataFrame]:
             df_entradas = df_entradas[df_entradas['DATA'].notna() & df_entradas['VALOR'].notna()]
             df_entradas['DATA'] = pd.to_datetime(df_entradas['DATA'], errors='coerce')
             df_entradas['VALOR'] = pd.to_numeric(df_entradas['VALOR'], errors='coerce').abs()
-            df_entradas['PAGAMENTO_NORM'] = df_entradas['PAGAMENTO'].apply(normalizar_texto)
+            df_entradas['PAGAMENTO_NORM'] = normalizar_serie(df_entradas['PAGAMENTO'])
             df_entradas['TIPO'] = 'ENTRADA'
         else:
             df_entradas = pd.DataFrame()
@@ -204,14 +232,14 @@ def carregar_extrato(arquivo: Any, banco: str = 'auto') -> pd.DataFrame:
     Retorna DataFrame com colunas: Data, Documento, Historico, Credito, Debito, Saldo
     """
     # Ler com header na linha 4 (índice 3) - padrão dos extratos gerados
-    df = pd.read_excel(arquivo, header=3)
+    df = ler_excel(arquivo, header=3)
     
     # Renomear colunas
     if len(df.columns) >= 6:
         df.columns = ['Data', 'Documento', 'Historico', 'Credito', 'Debito', 'Saldo']
     else:
         # Tentar outros formatos
-        df = pd.read_excel(arquivo, header=0)
+        df = ler_excel(arquivo, header=0)
         if 'Data' not in df.columns:
             raise ValueError("Formato de extrato não reconhecido")
     
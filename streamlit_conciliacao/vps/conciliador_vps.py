@@ -386,9 +386,9 @@ def conciliar_vps(df_lancamentos: pd.DataFrame, df_extrato: pd.DataFrame,
         - Dicionário com estatísticas e informações da conciliação
     """
     
-    # Inicializa coluna de conciliação no extrato
-    df_extrato['CONCILIADO'] = False
-    df_extrato['TIPO_CONCILIACAO'] = ''
+    # Inicializa coluna de conciliação num novo DataFrame: o extrato recebido
+    # não é alterado, então quem chama não precisa passar uma cópia.
+    df_extrato = df_extrato.assign(CONCILIADO=False, TIPO_CONCILIACAO='')
     
     # Lista para acumular todos os lançamentos
     todos_lancamentos = []
@@ -502,6 +502,9 @@ def conciliar_vps(df_lancamentos: pd.DataFrame, df_extrato: pd.DataFrame,
         colunas_extras = [c for c in df_resultado.columns if c not in colunas_csv]
         df_resultado = df_resultado[colunas_csv + colunas_extras]
         
+        # STATUS tem só dois valores e é usado nos filtros da interface
+        df_resultado['STATUS'] = df_resultado['STATUS'].astype('category')
+        
     else:
         df_resultado = pd.DataFrame()
     
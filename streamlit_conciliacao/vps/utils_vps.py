@@ -6,6 +6,7 @@ Funções para leitura de planilhas e normalização de dados
 
 from __future__ import annotations
 
+import importlib.util
 import pandas as pd
 import re
 from typing import Dict, Tuple, Optional
@@ -22,6 +23,25 @@ CONTA_BRADESCO = 7
 CONTA_SICREDI = 808
 CONTA_CAIXA = 5
 
+# Leitor calamine (Rust) quando disponível: bem mais rápido que o openpyxl para
+# planilhas grandes. Exige python-calamine e pandas >= 2.2.
+_PANDAS_VERSAO = tuple(int(p) for p in pd.__version__.split('.')[:2])
+EXCEL_ENGINE: Optional[str] = (
+    'calamine'
+    if importlib.util.find_spec('python_calamine') is not None and _PANDAS_VERSAO >= (2, 2)
+    else None
+)
+
+# Colunas de texto lidas sem inferência de tipo (NF não vira float por causa de
+# células vazias). Chaves ausentes na planilha são ignoradas pelo pandas.
+_DTYPES_LANCAMENTOS = {
+    'FORNECEDOR': object,
+    'NF': object,
+    'Forma de Pagamento ': object,
+    'PAGAMENTO': object,
+}
+_DTYPES_EXTRATOS = {'HISTORICO': object}
+
 
 # Mapeamento de bancos para contas contábeis
 BANCOS_CONTAS = {
@@ -231,48 +251,48 @@ def carregar_contas_contabeis(arquivo) -> Dict[str, pd.DataFrame]:
     - SICOOB/BRADESCO/SICREDI: LANCAMENTOS (histórico movimento) | CONTAS (conta contábil) | Historico (código histórico)
     """
     try:
-        # Lê todas as abas
-        excel_file = pd.ExcelFile(arquivo)
-        contas = {}
-        
-        # Aba RELATORIO FINANCEIRO
-        if 'RELATORIO FINANCEIRO' in excel_file.sheet_names:
-            df = pd.read_excel(arquivo, sheet_name='RELATORIO FINANCEIRO')
-            # Guarda nomes originais para mapeamento
-            colunas_originais = df.columns.tolist()
-            # Padroniza nomes de colunas
-            df.columns = df.columns.str.upper().str.strip()
-            # Renomeia para padrão esperado
-            df = df.rename(columns={
-                'LANCAMENTOS': 'FORNECEDOR',
-                'CONTAS': 'CONTA_CONTABIL',
-            })
-            # Não usa COD_HISTORICO da planilha - será definido pelo tipo de operação
-            contas['RELATORIO_FINANCEIRO'] = df
+        # Abre o arquivo uma única vez e lê cada aba a partir dele
+        with pd.ExcelFile(arquivo, engine=EXCEL_ENGINE) as excel_file:
+            contas = {}
         
-        # Abas de bancos (SICOOB, BRADESCO, SICREDI)
-        for banco in ['SICOOB', 'BRADESCO', 'SICREDI']:
-            if banco in excel_file.sheet_names:
-                df = pd.read_excel(arquivo, sheet_name=banco)
-                # Guarda nomes originais
+            # Aba RELATORIO FINANCEIRO
+            if 'RELATORIO FINANCEIRO' in excel_file.sheet_names:
+                df = excel_file.parse('RELATORIO FINANCEIRO')
+                # Guarda nomes originais para mapeamento
                 colunas_originais = df.columns.tolist()
+                # Padroniza nomes de colunas
+                df.columns = df.columns.str.upper().str.strip()
+                # Renomeia para padrão esperado
+                df = df.rename(columns={
+                    'LANCAMENTOS': 'FORNECEDOR',
+                    'CONTAS': 'CONTA_CONTABIL',
+                })
+                # Não usa COD_HISTORICO da planilha - será definido pelo tipo de operação
+                contas['RELATORIO_FINANCEIRO'] = df
+        
+            # Abas de bancos (SICOOB, BRADESCO, SICREDI)
+            for banco in ['SICOOB', 'BRADESCO', 'SICREDI']:
+                if banco in excel_file.sheet_names:
+                    df = excel_file.parse(banco)
+                    # Guarda nomes originais
+                    colunas_originais = df.columns.tolist()
                 
-                # Cria novo DataFrame com colunas padronizadas
-                df_novo = pd.DataFrame()
+                    # Cria novo DataFrame com colunas padronizadas
+                    df_novo = pd.DataFrame()
                 
-                # Mapeia colunas baseado na posição e nome original
-                for i, col in enumerate(colunas_originais):
-                    col_upper = str(col).upper().strip()
-                    if col_upper == 'LANCAMENTOS':
-                        df_novo['HISTORICO'] = df[col]  # Descrição do movimento bancário
-                    elif col_upper == 'CONTAS':
-                        df_novo['CONTA_CONTABIL'] = df[col]
-                    elif col_upper == 'HISTORICO':
-                        df_novo['COD_HISTORICO'] = df[col]  # Código numérico do histórico
-                    else:
-                        df_novo[col_upper] = df[col]
+                    # Mapeia colunas baseado na posição e nome original
+                    for i, col in enumerate(colunas_originais):
+                        col_upper = str(col).upper().strip()
+                        if col_upper == 'LANCAMENTOS':
+                            df_novo['HISTORICO'] = df[col]  # Descrição do movimento bancário
+                        elif col_upper == 'CONTAS':
+                            df_novo['CONTA_CONTABIL'] = df[col]
+                        elif col_upper == 'HISTORICO':
+                            df_novo['COD_HISTORICO'] = df[col]  # Código numérico do histórico
+                        else:
+                            df_novo[col_upper] = df[col]
                 
-                contas[banco] = df_novo
+                    contas[banco] = df_novo
         
         return contas
     
@@ -285,7 +305,7 @@ def carregar_lancamentos(arquivo) -> pd.DataFrame:
     Carrega a planilha de lançamentos (pagamentos da empresa).
     """
     try:
-        df = pd.read_excel(arquivo)
+        df = pd.read_excel(arquivo, engine=EXCEL_ENGINE, dtype=_DTYPES_LANCAMENTOS)
         
         # Padroniza nomes de colunas
         df.columns = df.columns.str.upper().str.strip()
@@ -330,6 +350,11 @@ def carregar_lancamentos(arquivo) -> pd.DataFrame:
         if 'PAGAMENTO' in df.columns:
             df['BANCO'] = df['PAGAMENTO'].str.upper().str.strip()
         
+        # Poucos valores distintos: categoria ocupa menos e filtra mais rápido
+        for col in ['PAGAMENTO', 'BANCO']:
+            if col in df.columns:
+                df[col] = df[col].astype('category')
+        
         return df
     
     except Exception as e:
@@ -343,11 +368,11 @@ def carregar_extratos(arquivo) -> pd.DataFrame:
     """
     try:
         # Carrega todas as abas do arquivo de extratos
-        xls = pd.ExcelFile(arquivo)
+        xls = pd.ExcelFile(arquivo, engine=EXCEL_ENGINE)
         
         dfs = []
         for aba in xls.sheet_names:
-            df_aba = pd.read_excel(xls, sheet_name=aba)
+            df_aba = xls.parse(aba, dtype=_DTYPES_EXTRATOS)
             
             # Padroniza nomes de colunas
             df_aba.columns = df_aba.columns.str.upper().str.strip()
@@ -388,6 +413,11 @@ def carregar_extratos(arquivo) -> pd.DataFrame:
         if 'HISTORICO' in df.columns:
             df['HISTORICO_NORM'] = df['HISTORICO'].apply(normalizar_texto)
         
+        # Poucos valores distintos: categoria ocupa menos e filtra mais rápido
+        for col in ['TIPO_MOVIMENTO', 'BANCO_ORIGEM']:
+            if col in df.columns:
+                df[col] = df[col].astype('category')
+        
         return df
     
     except Exception as e:
@@ -0,0 +1,102 @@
+import sys
+from io import BytesIO
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import pandas as pd  # noqa: E402
+import pytest  # noqa: E402
+import streamlit as st  # noqa: E402
+from streamlit_conciliacao import page_tradicao, page_tradicao_backup  # noqa: E402
+from streamlit_conciliacao.tradicao import extrator_pdf  # noqa: E402
+from streamlit_conciliacao.tradicao.conciliador_tradicao import conciliar_tradicao  # noqa: E402
+
+
+# ----------------------------------------------------------------------
+# Duas tarifas identicas no mesmo dia, sem conta cadastrada
+# ----------------------------------------------------------------------
+def test_nao_encontrados_identicos_sao_mantidos():
+    df_extrato = pd.DataFrame(
+        {
+            "Data": ["05/11/2025", "05/11/2025"],
+            "Historico": ["TARIFA PACOTE SERV", "TARIFA PACOTE SERV"],
+            "Credito": [0.0, 0.0],
+            "Debito": [45.0, 45.0],
+        }
+    )
+
+    df_resultado, nao_encontrados = conciliar_tradicao(df_extrato, None, {}, {})
+
+    assert df_resultado.empty
+    assert len(nao_encontrados) == 2
+    assert len(page_tradicao._sem_duplicados(nao_encontrados)) == 2
+
+
+def test_sem_duplicados_remove_apenas_mensagens_repetidas():
+    itens = ["Aba X ausente", "Aba X ausente", {"Valor": 1.0}, {"Valor": 1.0}]
+
+    assert page_tradicao._sem_duplicados(itens) == ["Aba X ausente", {"Valor": 1.0}, {"Valor": 1.0}]
+
+
+# ----------------------------------------------------------------------
+# PDF: texto do PyMuPDF e do pdfplumber rendem os mesmos lancamentos
+# ----------------------------------------------------------------------
+LINHAS_EXTRATO = [
+    "EXTRATO CONTA CORRENTE",
+    "Periodo: 01/11/2025 a 30/11/2025",
+    "01/11/2025 123 PIX ENVIADO FORNECEDOR ABC 1.500,00D 10.000,00C",
+    "02/11/2025 456 TARIFA MENSAL 45,00D 9.955,00C",
+    "03/11/2025 789 PIX RECEBIDO CLIENTE 800,00C 10.755,00C",
+]
+
+
+def _pdf_extrato() -> bytes:
+    pymupdf = pytest.importorskip("pymupdf")
+    doc = pymupdf.open()
+    pagina = doc.new_page()
+    for i, linha in enumerate(LINHAS_EXTRATO):
+        pagina.insert_text((50, 72 + i * 14), linha, fontsize=9)
+    return doc.tobytes()
+
+
+@pytest.mark.parametrize("banco", ["BB", "SICOOB"])
+def test_texto_fitz_e_pdfplumber_rendem_mesmos_lancamentos(banco):
+    pytest.importorskip("pdfplumber")
+    pdf = _pdf_extrato()
+    extrator = extrator_pdf._criar_extrator(banco)
+
+    df_fitz = extrator.processar_texto(extrator_pdf.extrair_texto_fitz(BytesIO(pdf)))
+    df_plumber = extrator.processar_texto(extrator.extrair_texto(BytesIO(pdf)))
+
+    assert len(df_plumber) == 3
+    pd.testing.assert_frame_equal(df_fitz, df_plumber)
+
+
+def test_load_extrato_pdf_cai_no_pdfplumber_quando_fitz_vem_vazio(monkeypatch):
+    pytest.importorskip("pdfplumber")
+    pdf = _pdf_extrato()
+    vazio = pd.DataFrame(columns=["Data", "Documento", "Historico", "Credito", "Debito", "Saldo"])
+    monkeypatch.setattr(page_tradicao_backup, "processar_pdf_extrato_fitz", lambda *_: vazio)
+    page_tradicao_backup._load_extrato_pdf.clear()
+
+    df = page_tradicao_backup._load_extrato_pdf(pdf, "SICOOB")
+
+    assert len(df) == 3
+    assert df["Debito"].tolist() == [1500.0, 45.0, 0.0]
+
+
+# ----------------------------------------------------------------------
+# Artefatos descartados do LRU de processo voltam a partir da sessao
+# ----------------------------------------------------------------------
+def test_artefatos_sobrevivem_ao_descarte_do_lru(monkeypatch):
+    monkeypatch.setattr(page_tradicao, "_MAX_ARTEFATOS", 1)
+    page_tradicao._artefatos().clear()
+
+    page_tradicao._guardar_artefatos("minha", metricas={"total": 1})
+    page_tradicao._publicar_artefatos("outra", {"metricas": {"total": 2}})
+    assert "minha" not in page_tradicao._artefatos()
+
+    assert page_tradicao._ler_artefatos() == {"metricas": {"total": 1}}
+    assert "minha" in page_tradicao._artefatos()
+    st.session_state.clear()
+    page_tradicao._artefatos().clear()